@@ -1,14 +1,24 @@
+import time
 import streamlit as st
+import startup
+import session
 import requests
 import re
+from api_client import api_post, backend_health, warm_up_backend
+from metrics import metrics
 
 st.set_page_config(
     page_title="Group 1 - COMP377",
     page_icon="👋",
 )
 
-# Base URL of our Flask backend
-API_BASE = "https://group1-comp377-groupproject-1.onrender.com"
+rerun_start = time.perf_counter()
+
+# Render puts the backend to sleep when idle, start waking it up while the user types
+warm_up_backend()
+
+# A login from an earlier connection (or another replica) is picked up here
+session.restore()
 
 # Initialize session state
 if 'access_token' not in st.session_state:
@@ -27,7 +37,7 @@ def register_user(name, email, password):
         "email": email,
         "password": password
     }
-    res = requests.post(f"{API_BASE}/register", json=payload)
+    res = api_post("/register", json=payload)
     return res
 
 # Login
@@ -36,12 +46,10 @@ def login_user(email, password):
         "email": email,
         "password": password
     }
-    res = requests.post(f"{API_BASE}/login", json=payload)
+    res = api_post("/login", json=payload)
     if res.status_code == 200:
         data = res.json()
-        st.session_state.access_token = data['access_token']
-        st.session_state.user_email = data['user']['email']
-        st.session_state.is_logged_in = True
+        session.login(data['access_token'], data['user']['email'])
         
         st.empty()
     return res
@@ -68,7 +76,11 @@ if st.session_state.show_register:
         elif len(password.strip()) == 0:
             st.error("🚫 Password cannot be empty.")
         else:
-            res = register_user(name, email, password)
+            try:
+                res = register_user(name, email, password)
+            except requests.RequestException:
+                st.error(f"❌ Could not reach the server (status: {backend_health().status}), please try again in a moment.")
+                st.stop()
             if res.status_code == 201:
                 st.success("🎉 Registered successfully! You can login now.")
                 st.session_state.show_register = False
@@ -85,7 +97,11 @@ else:
         email = st.text_input("Email")
         password = st.text_input("Password", type="password")
         if st.button("Login"):
-            res = login_user(email, password)
+            try:
+                res = login_user(email, password)
+            except requests.RequestException:
+                st.error(f"❌ Could not reach the server (status: {backend_health().status}), please try again in a moment.")
+                st.stop()
             if res.status_code == 200:
                 st.success(f"✅ Logged in as {st.session_state.user_email}")
                 st.subheader("Welcome to the app! Take a look around and make some predictions!")
@@ -108,11 +124,12 @@ else:
                  "\n- **Rebecca Khidesheli**\n"
                  "\n- **Hung Nguyen**\n")
 
+st.sidebar.caption(f"Server status: {backend_health().status}")
+
 # After the user logs in successfully
 if st.session_state.is_logged_in:
     st.sidebar.success(f"Logged in: {st.session_state.user_email}")
-    if st.sidebar.button("Logout"):
-        st.session_state.access_token = None
-        st.session_state.user_email = None
-        st.session_state.is_logged_in = False
-        st.success("✅ Logged out successfully.")
+session.logout_button()
+
+metrics().observe("Landing", "rerun", time.perf_counter() - rerun_start)
+startup.first_render("Landing")
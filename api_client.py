@@ -0,0 +1,221 @@
+import os
+import threading
+import time
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from metrics import metrics, timed
+
+# Base URL of our Flask backend, override it to point the app at a local stand-in
+API_BASE = os.environ.get("API_BASE", "https://group1-comp377-groupproject-1.onrender.com").rstrip("/")
+
+# (connect, read) timeouts in seconds; Render cold starts are slow, so reads get plenty of room
+CONNECT_TIMEOUT = float(os.environ.get("API_CONNECT_TIMEOUT", 5))
+READ_TIMEOUT = float(os.environ.get("API_READ_TIMEOUT", 60))
+
+# Only idempotent calls are retried, a retried POST /predict or /register could run twice
+RETRY_TOTAL = int(os.environ.get("API_RETRIES", 3))
+RETRY_BACKOFF = float(os.environ.get("API_RETRY_BACKOFF", 0.5))
+RETRY_METHODS = frozenset(["GET", "HEAD", "OPTIONS"])
+RETRY_STATUSES = (502, 503, 504)
+
+POOL_SIZE = int(os.environ.get("API_POOL_SIZE", 20))
+
+# After this many failed calls in a row the breaker opens and calls fail fast for the cooldown
+BREAKER_FAILURES = int(os.environ.get("API_BREAKER_FAILURES", 5))
+BREAKER_COOLDOWN = float(os.environ.get("API_BREAKER_COOLDOWN", 30))
+
+# Path pinged to wake Render up, and the least time between two pings from this process
+HEALTH_PATH = os.environ.get("API_HEALTH_PATH", "/")
+WARM_UP_INTERVAL = float(os.environ.get("API_WARM_UP_INTERVAL", 300))
+
+
+class BackendUnavailable(requests.ConnectionError):
+    """Raised without touching the network while the circuit breaker is open."""
+
+
+class BackendHealth:
+    """Latency tracker and circuit breaker shared by every session talking to the backend.
+
+    Connection errors, timeouts and gateway errors count as failures, except
+    timeouts of a caller's own short deadline; any other response means the backend is up. Once open, the breaker lets a single trial
+    call through after the cooldown and closes again if it succeeds.
+    """
+
+    def __init__(self, failure_threshold=BREAKER_FAILURES, cooldown=BREAKER_COOLDOWN):
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self.state = "closed"
+        self.consecutive_failures = 0
+        self.opened_at = 0.0
+        self.latency = None
+        self.last_success = None
+        self.last_failure = None
+        self.warming_up = False
+        self.last_warm_up = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow_request(self):
+        with self._lock:
+            if self.state == "closed":
+                return True
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.cooldown:
+                self.state = "half-open"
+            if self.state == "half-open" and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            return False
+
+    def record_success(self, seconds):
+        with self._lock:
+            # Exponentially weighted, so one slow cold start does not hide later fast calls for long
+            self.latency = seconds if self.latency is None else 0.8 * self.latency + 0.2 * seconds
+            self.last_success = time.time()
+            self.consecutive_failures = 0
+            self.state = "closed"
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.last_failure = time.time()
+            self.consecutive_failures += 1
+            if self.state == "half-open" or self.consecutive_failures >= self.failure_threshold:
+                self.state = "open"
+                self.opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self):
+        with self._lock:
+            self._trial_in_flight = False
+
+    def claim_warm_up(self, interval=WARM_UP_INTERVAL):
+        # True for the one caller that should send the next warm-up ping
+        with self._lock:
+            if self.warming_up or (self.last_warm_up and time.monotonic() - self.last_warm_up < interval):
+                return False
+            self.warming_up = True
+            self.last_warm_up = time.monotonic()
+            return True
+
+    @property
+    def retry_in(self):
+        return max(0.0, self.cooldown - (time.monotonic() - self.opened_at)) if self.state == "open" else 0.0
+
+    @property
+    def status(self):
+        if self.state == "open":
+            return "unavailable"
+        if self.warming_up and self.last_success is None:
+            return "waking up"
+        if self.last_success is None:
+            return "unknown"
+        return "online"
+
+
+@st.cache_resource(show_spinner=False)
+def backend_health():
+    return BackendHealth()
+
+
+@st.cache_resource(show_spinner=False)
+def get_session():
+    """The per-process HTTP session, so every call reuses pooled keep-alive connections."""
+    retry = Retry(
+        total=RETRY_TOTAL,
+        backoff_factor=RETRY_BACKOFF,
+        allowed_methods=RETRY_METHODS,
+        status_forcelist=RETRY_STATUSES,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def api_url(path):
+    return f"{API_BASE}/{path.lstrip('/')}"
+
+
+def auth_headers(token):
+    return {"Authorization": f"Bearer {token}"} if token else {}
+
+
+def api_request(method, path, token=None, timeout=None, count_failure=True, **kwargs):
+    """Send one request to the backend through the pooled session and the circuit breaker.
+
+    Pass count_failure=False with a deadline of your own that is shorter than the
+    backend may need: running out of it then says nothing about the backend's
+    health, so it does not count towards opening the breaker.
+    """
+    health = backend_health()
+    if not health.allow_request():
+        metrics().increment("backend", "breaker_rejected")
+        raise BackendUnavailable(f"The server is unavailable, trying again in {health.retry_in:.0f}s")
+
+    headers = {**auth_headers(token), **kwargs.pop("headers", {})}
+    start = time.perf_counter()
+    try:
+        with timed("backend", f"{method} {path}"):
+            response = get_session().request(
+                method,
+                api_url(path),
+                headers=headers,
+                timeout=timeout or (CONNECT_TIMEOUT, READ_TIMEOUT),
+                **kwargs,
+            )
+    except requests.ConnectionError:
+        # Connection failures, connect timeouts included, are the backend's whatever deadline was asked for
+        health.record_failure()
+        raise
+    except requests.Timeout:
+        if count_failure:
+            health.record_failure()
+        else:
+            health.release_trial()
+        raise
+    except Exception:
+        # Not the backend's fault, but a half-open trial slot must not stay taken
+        health.release_trial()
+        raise
+
+    if response.status_code in RETRY_STATUSES:
+        health.record_failure()
+    else:
+        health.record_success(time.perf_counter() - start)
+    metrics().increment("backend", f"{method} {path} {response.status_code}")
+    return response
+
+
+def api_get(path, token=None, **kwargs):
+    return api_request("GET", path, token=token, **kwargs)
+
+
+def api_post(path, token=None, **kwargs):
+    return api_request("POST", path, token=token, **kwargs)
+
+
+def warm_up_backend():
+    """Ping the backend on a background thread so a sleeping Render instance starts waking up.
+
+    Returns straight away. Pings are spaced at least WARM_UP_INTERVAL apart per
+    process, so many users opening the login page only wake it once.
+    """
+    health = backend_health()
+    if not health.claim_warm_up():
+        return
+
+    def ping():
+        try:
+            api_get(HEALTH_PATH)
+        except requests.RequestException:
+            pass
+        finally:
+            health.warming_up = False
+
+    threading.Thread(target=ping, name="backend-warm-up", daemon=True).start()
@@ -0,0 +1,128 @@
+import itertools
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from pathlib import Path
+
+import pandas as pd
+import requests
+from urllib3.exceptions import NewConnectionError
+
+from api_client import api_post, BackendUnavailable, RETRY_BACKOFF
+from features import FEATURES, FLOAT_FEATURES, encode_frame, invalid_values
+
+# Bad gateway and unavailable from Render mean the request never reached the app, so it is safe to send again.
+# A 504 or a read timeout may come after the backend already stored the prediction, those are not retried
+RETRY_STATUSES = (502, 503)
+
+
+def read_batch_file(uploaded_file):
+    if Path(uploaded_file.name).suffix.lower() == ".parquet":
+        return pd.read_parquet(uploaded_file)
+    return pd.read_csv(uploaded_file)
+
+
+def validate_batch(df):
+    """Split an uploaded frame into rows ready for /predict and rows that cannot be sent.
+
+    Returns (encoded, rejected): `encoded` has exactly the form's columns with the
+    form's types, `rejected` keeps the original index with a reason per row.
+    Raises ValueError when whole columns are missing.
+    """
+    missing = [col for col in FEATURES if col not in df.columns]
+    if missing:
+        raise ValueError(f"Missing columns: {', '.join(missing)}")
+
+    # Labels such as "18-24" or "Yes" are accepted too and become their codes here
+    numeric = encode_frame(df[FEATURES])
+    int_cols = [col for col in FEATURES if col not in FLOAT_FEATURES]
+
+    invalid = invalid_values(numeric)
+    bad_rows = invalid.any(axis=1)
+
+    # "Invalid BMI, Age" per bad row; a dot product of the flags with the column names joins them in one pass
+    flagged = invalid[bad_rows]
+    reasons = "Invalid " + flagged.dot(flagged.columns + ", ").str[:-2]
+    rejected = pd.DataFrame({"error": reasons.to_numpy(dtype=object)}, index=df.index[bad_rows])
+
+    encoded = numeric[~bad_rows].astype({col: "int64" for col in int_cols})
+    encoded[FLOAT_FEATURES] = encoded[FLOAT_FEATURES].astype("float64")
+    return encoded, rejected
+
+
+def never_sent(error):
+    # Only a failed connect is certain to have happened before the request went out; a connection
+    # aborted later (a stale keep-alive socket, say) may already have delivered the body
+    if isinstance(error, requests.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], "reason", None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def predict_row(features, token, retries=2, backoff=RETRY_BACKOFF):
+    # Never raises, failures come back as an error so the rest of the batch keeps going
+    for attempt in range(retries + 1):
+        if attempt:
+            time.sleep(backoff * 2 ** (attempt - 1))
+        try:
+            response = api_post("/predict", token=token, json=features)
+        except BackendUnavailable as e:
+            # The breaker is open, retrying within the backoff would only be rejected again
+            error = str(e)
+            break
+        except requests.RequestException as e:
+            error = str(e)
+            if never_sent(e):
+                continue
+            break
+        if response.status_code == 200:
+            result = response.json()
+            return {"prediction": bool(result["isDiabetes"]), "probability": float(result["probability"]), "error": None}
+        try:
+            error = response.json().get("error", f"HTTP {response.status_code}")
+        except ValueError:
+            error = f"HTTP {response.status_code}"
+        if response.status_code not in RETRY_STATUSES:
+            break
+    return {"prediction": None, "probability": None, "error": error}
+
+
+def score_batch(rows, token, max_workers=8, retries=2):
+    """Yield (position, result) for each row as soon as it is scored.
+
+    At most `max_workers` requests are in flight and only twice that many are
+    queued, so closing the generator (the user cancelling, or the script rerunning)
+    drops everything that has not been sent yet.
+    """
+    positions = iter(enumerate(rows))
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {}
+
+        def submit(count):
+            for position, features in itertools.islice(positions, count):
+                pending[executor.submit(predict_row, features, token, retries)] = position
+
+        submit(max_workers * 2)
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    position = pending.pop(future)
+                    submit(1)
+                    yield position, future.result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def batch_results(df, encoded, rejected, results):
+    # The uploaded rows with the outcome of each one, in the original order
+    scored = pd.DataFrame.from_dict(results, orient="index", columns=["prediction", "probability", "error"])
+    scored.index = encoded.index[scored.index.to_numpy(dtype=int)]
+
+    output = df.copy()
+    output["prediction"] = scored["prediction"].reindex(df.index)
+    output["probability"] = scored["probability"].reindex(df.index).astype(float)
+    output["error"] = scored["error"].reindex(df.index).fillna(rejected["error"].reindex(df.index))
+    unscored = ~df.index.isin(scored.index) & ~df.index.isin(rejected.index)
+    output.loc[unscored, "error"] = "Cancelled"
+    return output
@@ -0,0 +1 @@
+"""Local stand-ins and load tools for measuring the app without the Render backend."""
@@ -0,0 +1,147 @@
+import argparse
+import json
+import random
+import threading
+import time
+from email.utils import formatdate
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+
+class FakeBackend:
+    """In-memory stand-in for the Flask backend's /register, /login, /predict and /predictions.
+
+    `latency` is added to every request and `error_rate` turns that share of
+    requests into 503s. `cold_start` makes the first request after `idle_timeout`
+    seconds without traffic take that long, like Render waking an instance up.
+    """
+
+    def __init__(self, latency=0.0, error_rate=0.0, cold_start=0.0, idle_timeout=900.0, seed=None):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.cold_start = cold_start
+        self.idle_timeout = idle_timeout
+        self.users = {}
+        self.tokens = {}
+        self.predictions = {}
+        self.requests = 0
+        self._last_request = None
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    def delay(self):
+        # How long this request should stall before it is answered
+        with self._lock:
+            now = time.monotonic()
+            asleep = self._last_request is None or now - self._last_request > self.idle_timeout
+            self._last_request = now
+            self.requests += 1
+        return self.latency + (self.cold_start if asleep else 0.0)
+
+    def should_fail(self):
+        with self._lock:
+            return self._random.random() < self.error_rate
+
+    def handle(self, method, path, body, token):
+        """Return (status, payload, headers) for one request."""
+        if method == "GET" and path == "/":
+            return 200, {"status": "ok"}, {}
+        if method == "POST" and path == "/register":
+            if not body.get("email") or body["email"] in self.users:
+                return 400, {"error": "User already exists"}, {}
+            self.users[body["email"]] = body
+            return 201, {"message": "User registered"}, {}
+        if method == "POST" and path == "/login":
+            user = self.users.get(body.get("email"))
+            if user is None or user.get("password") != body.get("password"):
+                return 401, {"error": "Invalid credentials"}, {}
+            access_token = f"token-{len(self.tokens) + 1}"
+            self.tokens[access_token] = user["email"]
+            return 200, {"access_token": access_token, "user": {"email": user["email"]}}, {}
+
+        email = self.tokens.get(token)
+        if email is None:
+            return 401, {"error": "Missing or invalid token"}, {}
+        if method == "POST" and path == "/predict":
+            # A made-up but deterministic score, so repeated inputs give repeated answers
+            score = 0.02 * (body.get("BMI", 25) - 25) + 0.1 * body.get("HighBP", 0) + 0.05 * (body.get("GenHlth", 3) - 3)
+            probability = min(0.99, max(0.01, 0.3 + score))
+            record = {
+                "created_at": formatdate(usegmt=True),
+                "prediction": probability >= 0.5,
+                "probability": probability,
+                "features": body,
+            }
+            with self._lock:
+                self.predictions.setdefault(email, []).append(record)
+            return 200, {"isDiabetes": probability >= 0.5, "probability": probability}, {}
+        if method == "GET" and path == "/predictions":
+            records = list(reversed(self.predictions.get(email, [])))
+            return 200, records, {"ETag": f'"{email}-{len(records)}"'}
+        return 404, {"error": "Not found"}, {}
+
+    def handler_class(self):
+        backend = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _respond(self, method):
+                path = self.path.split("?", 1)[0]
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length) or b"{}") if length else {}
+                token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+
+                time.sleep(backend.delay())
+                if backend.should_fail():
+                    status, payload, headers = 503, {"error": "Injected failure"}, {}
+                else:
+                    status, payload, headers = backend.handle(method, path, body, token)
+                if status == 200 and headers.get("ETag") and headers["ETag"] == self.headers.get("If-None-Match"):
+                    status, payload = 304, None
+
+                data = b"" if payload is None else json.dumps(payload).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                self._respond("GET")
+
+            def do_POST(self):
+                self._respond("POST")
+
+        return Handler
+
+    def serve(self, host="127.0.0.1", port=0):
+        """Start serving on a daemon thread and return the server; port 0 picks a free one."""
+        server = ThreadingHTTPServer((host, port), self.handler_class())
+        server.daemon_threads = True
+        threading.Thread(target=server.serve_forever, name="fake-backend", daemon=True).start()
+        return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a local stand-in for the prediction backend.")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    parser.add_argument("--cold-start", type=float, default=0.0, help="extra seconds for the first request after idling")
+    parser.add_argument("--idle-timeout", type=float, default=900.0)
+    args = parser.parse_args()
+
+    backend = FakeBackend(args.latency, args.error_rate, args.cold_start, args.idle_timeout)
+    server = backend.serve(port=args.port)
+    print(f"Fake backend on http://127.0.0.1:{server.server_address[1]}, point the app at it with API_BASE")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
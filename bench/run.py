@@ -0,0 +1,216 @@
+import argparse
+import ast
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+from bench.fake_backend import FakeBackend
+
+APP_ROOT = Path(__file__).resolve().parent.parent
+PAGES = {
+    "Landing": "Landing.py",
+    "Data_Exploration": "pages/Data_Exploration.py",
+    "Predict": "pages/Predict.py",
+    "Prediction_History": "pages/Prediction_History.py",
+}
+BENCH_EMAIL = "bench@example.com"
+BENCH_PASSWORD = "bench"
+
+
+@contextmanager
+def serialized_ast_parse():
+    # AppTest parses the page on every run and ast.parse is not thread safe on CPython 3.11, so
+    # concurrent sessions take turns parsing; the rest of each run still overlaps
+    parse = ast.parse
+    lock = threading.Lock()
+
+    def locked_parse(*args, **kwargs):
+        with lock:
+            return parse(*args, **kwargs)
+
+    ast.parse = locked_parse
+    try:
+        yield
+    finally:
+        ast.parse = parse
+
+
+def rss_bytes():
+    # Current resident memory on Linux, peak resident memory elsewhere
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        scale = 1 if sys.platform == "darwin" else 1024
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], cwd=APP_ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def login():
+    """Register and log the bench user in against the fake backend, returning the token."""
+    from api_client import api_post
+
+    api_post("/register", json={"name": "Bench", "email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    response = api_post("/login", json={"email": BENCH_EMAIL, "password": BENCH_PASSWORD})
+    return response.json()["access_token"]
+
+
+def new_session(page, token, timeout):
+    from streamlit.testing.v1 import AppTest
+
+    app = AppTest.from_file(str(APP_ROOT / PAGES[page]), default_timeout=timeout)
+    if page != "Landing":
+        app.session_state["access_token"] = token
+        app.session_state["user_email"] = BENCH_EMAIL
+        app.session_state["is_logged_in"] = True
+    return app
+
+
+def interact(page, app):
+    """Do what a user on this page typically does between reruns."""
+    if page == "Landing" and not app.session_state["is_logged_in"]:
+        app.text_input[0].input(BENCH_EMAIL)
+        app.text_input[1].input(BENCH_PASSWORD)
+        app.button[0].click()
+    elif page == "Data_Exploration" and len(app.checkbox):
+        app.checkbox[0].set_value(not app.checkbox[0].value)
+    elif page == "Predict" and len(app.button):
+        app.slider[0].set_value(20.0 + (app.slider[0].value + 1) % 40)
+        app.button[0].click()
+
+
+def timed_run(app):
+    start = time.perf_counter()
+    app.run()
+    elapsed = time.perf_counter() - start
+    if app.exception:
+        raise RuntimeError(app.exception[0].message)
+    return elapsed
+
+
+def bench_page(page, token, reruns, sessions, duration, timeout):
+    result = {}
+
+    app = new_session(page, token, timeout)
+    result["cold_start_s"] = timed_run(app)
+
+    memory_before = rss_bytes()
+    latencies = []
+    for _ in range(reruns):
+        interact(page, app)
+        latencies.append(timed_run(app))
+    result["rerun_p50_s"] = statistics.median(latencies)
+    result["rerun_p95_s"] = percentile(latencies, 0.95)
+    result["rerun_max_s"] = max(latencies)
+    result["memory_growth_bytes"] = rss_bytes() - memory_before
+    result["memory_growth_per_rerun_bytes"] = result["memory_growth_bytes"] / max(reruns, 1)
+
+    # N sessions rerunning the page as fast as they can for `duration` seconds
+    completed = []
+    errors = []
+
+    def simulate(session):
+        count = 0
+        try:
+            while time.monotonic() < deadline:
+                interact(page, session)
+                timed_run(session)
+                count += 1
+        except Exception as e:
+            errors.append(str(e))
+        completed.append(count)
+
+    # Each session's first run happens before the clock starts, so throughput counts warm reruns only
+    simulated = []
+    for _ in range(sessions):
+        session = new_session(page, token, timeout)
+        timed_run(session)
+        simulated.append(session)
+    threads = [threading.Thread(target=simulate, args=(session,)) for session in simulated]
+    deadline = time.monotonic() + duration
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    result["sessions"] = sessions
+    result["throughput_reruns_per_s"] = sum(completed) / elapsed
+    result["errors"] = errors[:5]
+    return result
+
+
+def compare(results, baseline_path):
+    # Percentage change of every number against an earlier results file
+    baseline = json.loads(Path(baseline_path).read_text())["pages"]
+    for page, metrics in results["pages"].items():
+        for name, value in metrics.items():
+            before = baseline.get(page, {}).get(name)
+            if isinstance(value, (int, float)) and isinstance(before, (int, float)) and before:
+                print(f"{page:20} {name:32} {before:12.4f} -> {value:12.4f} ({(value - before) / before:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark every page headlessly against the fake backend.")
+    parser.add_argument("--pages", nargs="+", choices=list(PAGES), default=list(PAGES))
+    parser.add_argument("--reruns", type=int, default=20)
+    parser.add_argument("--sessions", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds of concurrent load per page")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake backend latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--timeout", type=float, default=120.0, help="seconds before a single rerun is a failure")
+    parser.add_argument("--workdir", type=Path, default=Path.cwd(), help="directory holding the dataset CSV")
+    parser.add_argument("--output", type=Path, default=Path("bench_results.json"))
+    parser.add_argument("--compare", type=Path, help="earlier results file to diff against")
+    args = parser.parse_args()
+
+    output = args.output.resolve()
+    backend = FakeBackend(latency=args.latency, error_rate=args.error_rate, seed=0)
+    server = backend.serve()
+    # Must be set before the app modules are imported, they read it once
+    os.environ["API_BASE"] = f"http://127.0.0.1:{server.server_address[1]}"
+    os.chdir(args.workdir)
+    sys.path.insert(0, str(APP_ROOT))
+
+    token = login()
+    results = {
+        "commit": git_commit(),
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": sys.version.split()[0],
+        "settings": {k: str(v) for k, v in vars(args).items()},
+        "pages": {},
+    }
+    with serialized_ast_parse():
+        for page in args.pages:
+            print(f"Benchmarking {page}...")
+            results["pages"][page] = bench_page(page, token, args.reruns, args.sessions, args.duration, args.timeout)
+
+    output.write_text(json.dumps(results, indent=2))
+    print(f"Results written to {output}")
+    if args.compare:
+        compare(results, args.compare)
+    server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+import altair as alt
+import pandas as pd
+
+# Every chart here is a Vega-Lite spec over a few hundred rows at most: the numbers are
+# aggregated on the server, Streamlit ships them as Arrow, and the browser does the drawing
+CHART_HEIGHT = 300
+
+
+def category_bars(values, labels, title, x_title, y_title="Count", percent=False):
+    """Bars for one value per category code, in code order, labelled with `labels`."""
+    data = pd.DataFrame({
+        "category": [labels.get(code, str(code)) for code in values.index],
+        "value": values.to_numpy(dtype=float),
+        "order": range(len(values)),
+    })
+    value_format = ".1%" if percent else ",.0f"
+    return alt.Chart(data, title=title, height=CHART_HEIGHT).mark_bar().encode(
+        x=alt.X("category:N", sort=alt.SortField("order"), title=x_title, axis=alt.Axis(labelAngle=-45)),
+        y=alt.Y("value:Q", title=y_title, axis=alt.Axis(format=".0%" if percent else ",.0f")),
+        tooltip=[alt.Tooltip("category:N", title=x_title), alt.Tooltip("value:Q", title=y_title, format=value_format)],
+    )
+
+
+def histogram_bars(edges, counts, title, x_title):
+    # Pre-binned counts, so the browser gets one row per bin rather than one per person
+    data = pd.DataFrame({"start": edges[:-1], "end": edges[1:], "count": counts})
+    return alt.Chart(data, title=title, height=CHART_HEIGHT).mark_bar().encode(
+        x=alt.X("start:Q", bin="binned", title=x_title),
+        x2="end:Q",
+        y=alt.Y("count:Q", title="Count"),
+        tooltip=[alt.Tooltip("start:Q", title="From"), alt.Tooltip("end:Q", title="To"),
+                 alt.Tooltip("count:Q", title="Count", format=",.0f")],
+    )
+
+
+def box_plot(summary, title, x_title):
+    """Horizontal boxplot from a data_stats.box_summary dict; fliers are the summary's already thinned ones."""
+    box = pd.DataFrame([{key: float(summary[key]) for key in ("whislo", "q1", "med", "q3", "whishi", "mean")}])
+    tooltip = [alt.Tooltip(field, title=name, format=".1f") for field, name in
+               [("whislo:Q", "Lower whisker"), ("q1:Q", "Q1"), ("med:Q", "Median"), ("q3:Q", "Q3"),
+                ("whishi:Q", "Upper whisker"), ("mean:Q", "Mean")]]
+    base = alt.Chart(box)
+    whiskers = base.mark_rule().encode(x=alt.X("whislo:Q", title=x_title, scale=alt.Scale(zero=False)), x2="whishi:Q")
+    quartiles = base.mark_bar(size=40).encode(x="q1:Q", x2="q3:Q", tooltip=tooltip)
+    median = base.mark_tick(color="white", size=40, thickness=2).encode(x="med:Q", tooltip=tooltip)
+    fliers = alt.Chart(pd.DataFrame({"value": summary["fliers"]})).mark_point(opacity=0.6).encode(
+        x="value:Q", tooltip=alt.Tooltip("value:Q", title="Outlier"))
+    return alt.layer(whiskers, quartiles, median, fliers, title=title, height=120)
+
+
+def heatmap(data, x, y, value, x_title, y_title, value_title):
+    """Colored cells for every (x, y) pair in a long-format frame; x and y keep the frame's order."""
+    return alt.Chart(data, height=CHART_HEIGHT).mark_rect().encode(
+        x=alt.X(f"{x}:O", sort=None, title=x_title),
+        y=alt.Y(f"{y}:O", sort=None, title=y_title),
+        color=alt.Color(f"{value}:Q", title=value_title, scale=alt.Scale(scheme="viridis")),
+        tooltip=[alt.Tooltip(f"{x}:O", title=x_title), alt.Tooltip(f"{y}:O", title=y_title),
+                 alt.Tooltip(f"{value}:Q", title=value_title, format=".1f")],
+    )
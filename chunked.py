@@ -0,0 +1,223 @@
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import streamlit as st
+
+from cohort import CohortCube
+from data_stats import TARGET_COLUMN, feature_columns, correlation_strength, histogram
+from dataset import apply_schema, check_dataset, sidecar_path, sidecar_is_current
+
+# "memory" always loads the whole file, "chunked" always streams it, "auto" streams files over the threshold
+EXPLORATION_MODE = os.environ.get("EXPLORATION_MODE", "auto")
+CHUNKED_THRESHOLD_BYTES = int(os.environ.get("EXPLORATION_CHUNKED_BYTES", 1_000_000_000))
+CHUNK_ROWS = int(os.environ.get("EXPLORATION_CHUNK_ROWS", 250_000))
+# Worker processes for chunk aggregation, 0 runs everything in the page's own process
+CHUNK_PROCESSES = int(os.environ.get("EXPLORATION_PROCESSES", 0))
+
+HEAD_ROWS = 5
+
+
+def use_chunked(csv_path):
+    if EXPLORATION_MODE == "chunked":
+        return True
+    if EXPLORATION_MODE == "memory":
+        return False
+    return Path(csv_path).stat().st_size > CHUNKED_THRESHOLD_BYTES
+
+
+class QuantileSketch:
+    """Mergeable value -> count histogram used for medians and boxplots.
+
+    BRFSS columns only take a few dozen distinct values, so the sketch is exact
+    for them. If a column has more than `max_bins` distinct values the sketch is
+    compacted onto an even grid, which keeps memory fixed at the cost of
+    quantiles being accurate to one grid step.
+    """
+
+    def __init__(self, max_bins=4096):
+        self.max_bins = max_bins
+        self.counts = pd.Series(dtype=float)
+
+    def add(self, values):
+        values = pd.Series(values).dropna()
+        self.counts = self.counts.add(values.value_counts().astype(float), fill_value=0)
+        self._compact()
+
+    def merge(self, other):
+        self.counts = self.counts.add(other.counts, fill_value=0)
+        self._compact()
+        return self
+
+    def _compact(self):
+        if len(self.counts) <= self.max_bins:
+            self.counts = self.counts.sort_index()
+            return
+        values = self.counts.index.to_numpy(dtype=float)
+        low, high = values.min(), values.max()
+        grid = np.linspace(low, high, self.max_bins)
+        positions = np.rint((values - low) / (high - low) * (self.max_bins - 1)).astype(int)
+        self.counts = self.counts.groupby(grid[positions]).sum()
+
+    def quantile(self, q):
+        # Same linear interpolation as np.percentile on the expanded data
+        values = self.counts.index.to_numpy(dtype=float)
+        cumulative = self.counts.cumsum().to_numpy()
+        position = q * (cumulative[-1] - 1)
+        lower = values[np.searchsorted(cumulative, np.floor(position) + 1)]
+        upper = values[np.searchsorted(cumulative, np.ceil(position) + 1)]
+        return lower + (upper - lower) * (position - np.floor(position))
+
+
+class PartialAggregates:
+    """Everything the exploration page needs from a slice of rows, mergeable with other slices.
+
+    Sums are exact for the integer-valued BRFSS columns in float64, so merging
+    chunks in any order gives the same numbers as one pass over the whole file.
+    """
+
+    def __init__(self, head, dtypes, nulls, rows, sums, value_counts, sketches, cube):
+        self.head = head
+        self.dtypes = dtypes
+        self.nulls = nulls
+        self.rows = rows
+        self.sums = sums
+        self.value_counts = value_counts
+        self.sketches = sketches
+        self.cube = cube
+
+    @classmethod
+    def from_chunk(cls, chunk):
+        chunk = apply_schema(chunk)
+        features = feature_columns(chunk)
+        x = chunk[features].to_numpy(dtype=float)
+        y = chunk[TARGET_COLUMN].to_numpy(dtype=float)
+        sums = pd.DataFrame({
+            "n": np.full(len(features), len(chunk), dtype=float),
+            "x": x.sum(axis=0),
+            "xx": (x * x).sum(axis=0),
+            "xy": x.T @ y,
+            "y": y.sum(),
+            "yy": (y * y).sum(),
+            "min": x.min(axis=0),
+            "max": x.max(axis=0),
+        }, index=features)
+        value_counts = {col: chunk[col].value_counts() for col in features}
+        sketches = {}
+        for col in features:
+            sketches[col] = QuantileSketch()
+            sketches[col].add(chunk[col])
+        return cls(chunk.head(HEAD_ROWS), chunk.dtypes, chunk.isnull().sum(), len(chunk),
+                   sums, value_counts, sketches, CohortCube.build(chunk))
+
+    def merge(self, other):
+        if len(self.head) < HEAD_ROWS:
+            self.head = pd.concat([self.head, other.head]).head(HEAD_ROWS)
+        self.nulls = self.nulls.add(other.nulls, fill_value=0).astype(int)
+        self.rows += other.rows
+        mins = np.minimum(self.sums["min"], other.sums["min"])
+        maxs = np.maximum(self.sums["max"], other.sums["max"])
+        self.sums = self.sums.add(other.sums)
+        self.sums["min"], self.sums["max"] = mins, maxs
+        for col, counts in other.value_counts.items():
+            self.value_counts[col] = self.value_counts[col].add(counts, fill_value=0).astype(int)
+        for col, sketch in other.sketches.items():
+            self.sketches[col].merge(sketch)
+        self.cube = self.cube.merge(other.cube)
+        return self
+
+    def column_summary(self):
+        """The same table data_stats.column_summary builds from a DataFrame."""
+        s = self.sums
+        mean = s["x"] / s["n"]
+        var = (s["xx"] - s["n"] * mean ** 2) / (s["n"] - 1)
+        cov = s["xy"] / s["n"] - mean * s["y"] / s["n"]
+        var_x = s["xx"] / s["n"] - mean ** 2
+        var_y = s["yy"] / s["n"] - (s["y"] / s["n"]) ** 2
+        correlation = (cov / np.sqrt(var_x * var_y)).where(var_x * var_y > 1e-12)
+        return pd.DataFrame({
+            "correlation": correlation,
+            "strength": correlation.map(correlation_strength),
+            "median": [self.sketches[col].quantile(0.5) for col in s.index],
+            "mean": mean,
+            "std": np.sqrt(var),
+            "min": s["min"],
+            "max": s["max"],
+        })
+
+    def box_summary(self, column, whis=1.5, max_fliers=200):
+        # Same dict shape as data_stats.box_summary, from the column's sketch instead of its values
+        sketch = self.sketches[column]
+        q1, med, q3 = (sketch.quantile(q) for q in (0.25, 0.5, 0.75))
+        iqr = q3 - q1
+        low, high = q1 - whis * iqr, q3 + whis * iqr
+        values = sketch.counts.index.to_numpy(dtype=float)
+        counts = sketch.counts.to_numpy()
+        inside = (values >= low) & (values <= high)
+        fliers = values[~inside]
+        if fliers.size > max_fliers:
+            fliers = fliers[np.linspace(0, fliers.size - 1, max_fliers).round().astype(int)]
+        return {
+            "med": med,
+            "q1": q1,
+            "q3": q3,
+            "whislo": values[inside].min(),
+            "whishi": values[inside].max(),
+            "fliers": fliers,
+            "mean": self.sums.at[column, "x"] / self.sums.at[column, "n"],
+            "count": int(counts.sum()),
+            "outliers": int(counts[~inside].sum()),
+        }
+
+    def histogram(self, column):
+        # Same bins as data_stats.histogram on the raw column, from the sketch's value counts
+        sketch = self.sketches[column]
+        return histogram(sketch.counts.index.to_numpy(dtype=float), weights=sketch.counts.to_numpy())
+
+
+def iter_chunks(csv_path, chunk_rows=CHUNK_ROWS):
+    """Yield the file as DataFrames of at most `chunk_rows` rows.
+
+    Prefers the memory-mapped Parquet sidecar when it matches the CSV, reading it
+    one record batch at a time; otherwise streams the CSV.
+    """
+    if sidecar_is_current(csv_path):
+        for batch in pq.ParquetFile(sidecar_path(csv_path), memory_map=True).iter_batches(batch_size=chunk_rows):
+            yield batch.to_pandas()
+        return
+    yield from pd.read_csv(csv_path, chunksize=chunk_rows)
+
+
+def aggregate_file(csv_path, chunk_rows=CHUNK_ROWS, processes=CHUNK_PROCESSES):
+    """Fold every chunk of the file into one PartialAggregates.
+
+    With `processes` set, chunks are aggregated in a process pool; only a couple
+    of chunks per worker are in flight, so memory stays bounded either way.
+    """
+    chunks = iter_chunks(csv_path, chunk_rows)
+    if not processes:
+        partials = map(PartialAggregates.from_chunk, chunks)
+        total = next(partials)
+        for partial in partials:
+            total.merge(partial)
+        return total
+
+    total = None
+    with ProcessPoolExecutor(max_workers=processes) as executor:
+        while True:
+            window = list(itertools.islice(chunks, processes * 2))
+            if not window:
+                break
+            for partial in executor.map(PartialAggregates.from_chunk, window):
+                total = partial if total is None else total.merge(partial)
+    return total
+
+
+@st.cache_resource(show_spinner="Reading the dataset in chunks...", max_entries=1)
+def chunked_aggregates(csv_path, fingerprint):
+    check_dataset(csv_path)
+    return aggregate_file(csv_path)
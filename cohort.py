@@ -0,0 +1,95 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from data_stats import TARGET_COLUMN, feature_columns, correlation_strength
+
+# Columns the exploration page can filter on; every combination is one cell of the cube
+COHORT_DIMENSIONS = ["Age", "Education", "Income", "Sex", "HighBP"]
+
+
+class CohortCube:
+    """Counts and moment sums per combination of COHORT_DIMENSIONS values.
+
+    Each cell holds the row count, the number of diabetic rows and, for every
+    feature x, the sums of x, x*x and x*target. That is enough to rebuild category
+    counts, diabetes rates and correlations for any filter by summing a few
+    thousand cells, however many rows the dataset has.
+    """
+
+    def __init__(self, cells, features):
+        self.cells = cells
+        self.features = features
+
+    @classmethod
+    def build(cls, df, dimensions=COHORT_DIMENSIONS):
+        features = feature_columns(df)
+        groups = df.groupby(dimensions, observed=True, sort=True)
+        group_ids = groups.ngroup().to_numpy()
+        index = groups.size().index
+        size = len(index)
+        y = df[TARGET_COLUMN].to_numpy(dtype=float)
+
+        # One bincount per column keeps memory flat, instead of materialising 60-odd float64 columns
+        sums = {
+            "n": np.bincount(group_ids, minlength=size).astype(float),
+            "y": np.bincount(group_ids, weights=y, minlength=size),
+            "yy": np.bincount(group_ids, weights=y * y, minlength=size),
+        }
+        for col in features:
+            x = df[col].to_numpy(dtype=float)
+            sums[f"{col}:x"] = np.bincount(group_ids, weights=x, minlength=size)
+            sums[f"{col}:xx"] = np.bincount(group_ids, weights=x * x, minlength=size)
+            sums[f"{col}:xy"] = np.bincount(group_ids, weights=x * y, minlength=size)
+        return cls(pd.DataFrame(sums, index=index), features)
+
+    def merge(self, other):
+        # Cubes of two row slices add up cell by cell, which is how chunked reading builds one
+        return CohortCube(self.cells.add(other.cells, fill_value=0), self.features)
+
+    def select(self, filters=None):
+        """The cells matching `filters`, a dict of dimension to the values to keep (empty keeps all)."""
+        mask = np.ones(len(self.cells), dtype=bool)
+        for dimension, values in (filters or {}).items():
+            if values:
+                mask &= self.cells.index.get_level_values(dimension).isin(values)
+        return self.cells[mask]
+
+    def size(self, filters=None):
+        return int(self.select(filters)["n"].sum())
+
+    def distribution(self, column, filters=None):
+        # Row counts per value of one dimension within the cohort
+        return self.select(filters).groupby(level=column)["n"].sum().astype(int)
+
+    def diabetes_rate(self, column=None, filters=None):
+        cells = self.select(filters)
+        if column is None:
+            n = cells["n"].sum()
+            return cells["y"].sum() / n if n else np.nan
+        totals = cells.groupby(level=column)[["n", "y"]].sum()
+        return totals["y"] / totals["n"]
+
+    def correlations(self, filters=None):
+        """Correlation of every feature with the target in the cohort, with its strength bucket."""
+        totals = self.select(filters).sum()
+        n = totals["n"]
+        if not n:
+            return pd.DataFrame(columns=["correlation", "strength"])
+        var_y = totals["yy"] / n - (totals["y"] / n) ** 2
+        rows = {}
+        for col in self.features:
+            mean_x = totals[f"{col}:x"] / n
+            var_x = totals[f"{col}:xx"] / n - mean_x ** 2
+            cov = totals[f"{col}:xy"] / n - mean_x * totals["y"] / n
+            denominator = np.sqrt(var_x * var_y)
+            # Columns that are constant within the cohort have no correlation, like Series.corr
+            rows[col] = cov / denominator if denominator > 1e-12 else np.nan
+        correlations = pd.Series(rows, name="correlation")
+        return pd.DataFrame({"correlation": correlations, "strength": correlations.map(correlation_strength)})
+
+
+@st.cache_resource(show_spinner=False, max_entries=1)
+def cohort_cube(_df, fingerprint):
+    """The cube for one dataset version, built once and shared like the dataset itself."""
+    return CohortCube.build(_df)
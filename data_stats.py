@@ -0,0 +1,111 @@
+import streamlit as st
+import pandas as pd
+import numpy as np
+
+TARGET_COLUMN = "Diabetes_binary"
+IGNORED_COLUMNS = [TARGET_COLUMN, "ID"]
+
+# Absolute correlation above which a column lands in each bucket
+STRONG_CORRELATION = 0.2
+MEDIUM_CORRELATION = 0.1
+
+# Most bins a histogram sends to the browser
+HISTOGRAM_BINS = 200
+
+
+def feature_columns(df):
+    return [col for col in df.columns if col not in IGNORED_COLUMNS]
+
+
+def correlation_strength(correlation):
+    if abs(correlation) > STRONG_CORRELATION:
+        return "strong"
+    elif abs(correlation) > MEDIUM_CORRELATION:
+        return "medium"
+    return "weak"
+
+
+# The fingerprint is the cache key, the leading underscore stops Streamlit hashing 250k rows
+@st.cache_data(show_spinner=False, max_entries=4)
+def column_summary(_df, fingerprint):
+    """Every per-column number the exploration page shows, computed in one pass.
+
+    Returns one row per feature column with its correlation to the target, its
+    correlation bucket, and the median, mean, std, min and max from describe().
+    """
+    cols = feature_columns(_df)
+    features = _df[cols]
+    summary = features.describe().T[["50%", "mean", "std", "min", "max"]].rename(columns={"50%": "median"})
+    summary.insert(0, "correlation", features.corrwith(_df[TARGET_COLUMN]))
+    # NaN correlations (constant columns) fail every comparison and end up weak, like before
+    summary.insert(1, "strength", summary["correlation"].map(correlation_strength))
+    return summary
+
+
+def box_summary(values, whis=1.5, max_fliers=200):
+    """Boxplot statistics (quartiles, whiskers and fliers), plus a few extras.
+
+    Whiskers follow the usual Tukey rule (furthest data point within `whis`
+    IQRs of the box). Outliers are collapsed to their distinct values and, if
+    there are still more than `max_fliers`, thinned to evenly spaced ones that
+    keep both extremes, so drawing cost does not grow with the data.
+    """
+    values = np.asarray(values, dtype=float)
+    values = values[~np.isnan(values)]
+    q1, med, q3 = np.percentile(values, [25, 50, 75])
+    iqr = q3 - q1
+    low, high = q1 - whis * iqr, q3 + whis * iqr
+    inside = values[(values >= low) & (values <= high)]
+    outliers = values[(values < low) | (values > high)]
+
+    fliers = np.unique(outliers)
+    if fliers.size > max_fliers:
+        fliers = fliers[np.linspace(0, fliers.size - 1, max_fliers).round().astype(int)]
+
+    return {
+        "med": med,
+        "q1": q1,
+        "q3": q3,
+        "whislo": inside.min(),
+        "whishi": inside.max(),
+        "fliers": fliers,
+        "mean": values.mean(),
+        "count": int(values.size),
+        "outliers": int(outliers.size),
+    }
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def column_box_summary(_df, fingerprint, column):
+    return box_summary(_df[column].to_numpy())
+
+
+def histogram(values, weights=None, max_bins=HISTOGRAM_BINS):
+    """Bin edges and counts for `values`, in whole-number bins unless that would be more than `max_bins`.
+
+    `weights` lets callers bin value -> count tables (like a quantile sketch) instead of raw values.
+    """
+    values = np.asarray(values, dtype=float)
+    low, high = np.floor(np.nanmin(values)), np.ceil(np.nanmax(values))
+    width = max(1.0, np.ceil((high - low + 1) / max_bins))
+    edges = low + width * np.arange(int((high - low) // width) + 2)
+    counts, _ = np.histogram(values, bins=edges, weights=weights)
+    return edges, counts
+
+
+@st.cache_data(show_spinner=False, max_entries=8)
+def column_histogram(_df, fingerprint, column):
+    return histogram(_df[column].to_numpy())
+
+
+def box_summary_table(summary):
+    # The same numbers the boxplot draws, as something st.table can show
+    return pd.Series({
+        "Lower whisker": summary["whislo"],
+        "Q1": summary["q1"],
+        "Median": summary["med"],
+        "Q3": summary["q3"],
+        "Upper whisker": summary["whishi"],
+        "Mean": round(summary["mean"], 7),
+        "Outliers": summary["outliers"],
+    }, name="value")
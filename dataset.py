@@ -0,0 +1,287 @@
+import argparse
+import fcntl
+import hashlib
+import os
+import threading
+import time
+import streamlit as st
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from pathlib import Path
+
+from features import FEATURE_SCHEMA
+
+# Local copy of the CDC BRFSS dataset, shared by every session in this process
+DATASET_PATH = Path("diabetes_012_health_indicators_BRFSS2015.csv")
+
+# Compact type and allowed range for every BRFSS column; flags and codes fit in a byte
+DATASET_SCHEMA = {
+    "ID": ("uint32", 0, 2**32 - 1),
+    "Diabetes_binary": ("uint8", 0, 1),
+    **{name: (f.dtype, f.low, f.high) for name, f in FEATURE_SCHEMA.items()},
+}
+
+# The CDC Diabetes Health Indicators dataset on the UCI ML repo
+UCI_DATASET_ID = 891
+
+# How long a process waits for another one's download before giving up
+LOCK_TIMEOUT_SECONDS = 600
+
+# Keys stored in the Parquet sidecar so we can tell if it is stale
+SIGNATURE_SIZE_KEY = b"source_size"
+SIGNATURE_MTIME_KEY = b"source_mtime_ns"
+
+
+def sidecar_path(csv_path=DATASET_PATH):
+    # The Parquet copy sits right next to the CSV
+    return Path(csv_path).with_suffix(".parquet")
+
+
+def source_signature(csv_path=DATASET_PATH):
+    # Size and mtime of the CSV, anything that changes the file changes this
+    stat = Path(csv_path).stat()
+    return stat.st_size, stat.st_mtime_ns
+
+
+def dataset_fingerprint(csv_path=DATASET_PATH):
+    # Short string other caches can key on, so they invalidate with the dataset
+    size, mtime_ns = source_signature(csv_path)
+    return f"{size}-{mtime_ns}"
+
+
+def apply_schema(df):
+    """Check every known column against DATASET_SCHEMA and downcast it to its compact type.
+
+    Raises ValueError naming the column when values are missing, out of range, or
+    not whole numbers where a code is expected. Columns not in the schema are kept as they are.
+    """
+    types = {}
+    for col, (dtype, low, high) in DATASET_SCHEMA.items():
+        if col not in df.columns or df[col].dtype == dtype:
+            continue
+        values = df[col]
+        if values.isna().any():
+            raise ValueError(f"Column {col} has missing values")
+        if values.min() < low or values.max() > high:
+            raise ValueError(f"Column {col} has values outside {low}-{high}")
+        if dtype.startswith("uint") and (values % 1 != 0).any():
+            raise ValueError(f"Column {col} should only contain whole numbers")
+        types[col] = dtype
+    return df.astype(types) if types else df
+
+
+def memory_usage(df):
+    # Bytes held by the frame's columns, what the compact types are meant to shrink
+    return int(df.memory_usage(index=False).sum())
+
+
+def sidecar_is_current(csv_path, signature=None):
+    # True when the Parquet copy was written from exactly this version of the CSV
+    path = sidecar_path(csv_path)
+    if not path.exists():
+        return False
+    metadata = pq.read_schema(path).metadata or {}
+    stored = (int(metadata.get(SIGNATURE_SIZE_KEY, -1)), int(metadata.get(SIGNATURE_MTIME_KEY, -1)))
+    return stored == tuple(signature or source_signature(csv_path))
+
+
+def _read_sidecar(csv_path, signature):
+    path = sidecar_path(csv_path)
+    try:
+        if not sidecar_is_current(csv_path, signature):
+            return None
+        # Memory mapping lets the OS page the columns in instead of us copying the whole file
+        return pq.read_table(path, memory_map=True).to_pandas()
+    except (OSError, ValueError, pa.ArrowException):
+        return None
+
+
+def _write_sidecar(df, csv_path, signature):
+    path = sidecar_path(csv_path)
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    metadata = dict(table.schema.metadata or {})
+    metadata[SIGNATURE_SIZE_KEY] = str(signature[0]).encode()
+    metadata[SIGNATURE_MTIME_KEY] = str(signature[1]).encode()
+    tmp_path = path.with_suffix(".parquet.tmp")
+    try:
+        pq.write_table(table.replace_schema_metadata(metadata), tmp_path)
+        tmp_path.replace(path)
+    except OSError:
+        # A read-only deployment still works, it just parses the CSV on cold start
+        tmp_path.unlink(missing_ok=True)
+
+
+def read_dataset(csv_path, signature):
+    # Uncached load: the sidecar when it is current, otherwise parse the CSV and write a new sidecar
+    df = _read_sidecar(csv_path, signature)
+    if df is None:
+        df = apply_schema(pd.read_csv(csv_path))
+        _write_sidecar(df, csv_path, signature)
+    # A sidecar from before the schema existed still has wide types, this is free otherwise
+    return apply_schema(df)
+
+
+# One entry per dataset version; the signature argument makes a changed CSV a cache miss
+@st.cache_resource(show_spinner=False, max_entries=1)
+def _load_dataset(csv_path, signature):
+    check_dataset(csv_path)
+    return read_dataset(csv_path, signature)
+
+
+def load_dataset(csv_path=DATASET_PATH):
+    """Return the process-wide copy of the dataset, parsing the CSV only when it changes.
+
+    Columns come back in their compact DATASET_SCHEMA types. The DataFrame is
+    shared by every session, so callers must treat it as read-only. Raises
+    ValueError when the file fails its recorded checksum or the schema checks.
+    """
+    return _load_dataset(str(csv_path), source_signature(csv_path))
+
+
+def checksum_path(csv_path=DATASET_PATH):
+    return Path(csv_path).with_name(Path(csv_path).name + ".sha256")
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def check_dataset(csv_path=DATASET_PATH):
+    # A ValueError like apply_schema's, so pages report a corrupted download like any other bad file
+    if not verify_dataset(csv_path):
+        raise ValueError(f"{Path(csv_path).name} does not match the checksum recorded when it was downloaded")
+
+
+def verify_dataset(csv_path=DATASET_PATH):
+    """False if the CSV does not match the checksum recorded when it was downloaded.
+
+    A CSV that was put in place by hand has no checksum file and is trusted as is.
+    """
+    recorded = checksum_path(csv_path)
+    if not recorded.exists():
+        return True
+    return file_sha256(csv_path) == recorded.read_text().strip()
+
+
+class DatasetLock:
+    """Cross-process lock around downloading the dataset, an flock on a file next to the CSV.
+
+    The kernel drops the lock when its holder exits, however it dies, so a crashed
+    download never leaves a stale lock behind and a slow one is never taken over.
+    """
+
+    def __init__(self, csv_path=DATASET_PATH, timeout=LOCK_TIMEOUT_SECONDS):
+        self.path = Path(csv_path).with_name(Path(csv_path).name + ".lock")
+        self.timeout = timeout
+        self._fd = None
+
+    def __enter__(self):
+        deadline = time.monotonic() + self.timeout
+        fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+        while True:
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                self._fd = fd
+                return self
+            except BlockingIOError:
+                if time.monotonic() > deadline:
+                    os.close(fd)
+                    raise TimeoutError(f"Timed out waiting for {self.path}")
+                time.sleep(0.5)
+
+    def __exit__(self, *exc):
+        # The file stays, unlinking it could split waiters between the old and a new inode
+        fcntl.flock(self._fd, fcntl.LOCK_UN)
+        os.close(self._fd)
+        self._fd = None
+
+
+def download_dataset(csv_path=DATASET_PATH):
+    """Fetch the dataset from the UCI ML repo and move it into place atomically.
+
+    Only one process downloads at a time; the others wait on the lock and then
+    find the file already there. The CSV is written to a temp file, checked
+    against the checksum of what we meant to write, and only then renamed over
+    `csv_path`, so readers never see a half-written file.
+    """
+    csv_path = Path(csv_path)
+    with DatasetLock(csv_path):
+        if csv_path.exists():
+            return csv_path
+        from ucimlrepo import fetch_ucirepo
+
+        data = fetch_ucirepo(id=UCI_DATASET_ID).data.original.to_csv(index=False).encode()
+        expected = hashlib.sha256(data).hexdigest()
+        tmp_path = csv_path.with_name(f".{csv_path.name}.{os.getpid()}.tmp")
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            if file_sha256(tmp_path) != expected:
+                raise OSError(f"Checksum mismatch writing {csv_path}")
+            checksum_path(csv_path).write_text(expected)
+            os.replace(tmp_path, csv_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+    return csv_path
+
+
+class DatasetManager:
+    """Downloads the dataset on a background thread so pages never block on it."""
+
+    def __init__(self, csv_path=DATASET_PATH):
+        self.csv_path = Path(csv_path)
+        self.error = None
+        self._thread = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self.csv_path.exists()
+
+    @property
+    def preparing(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self):
+        """Start a download unless the file is there or one is already running."""
+        with self._lock:
+            if self.ready or self.preparing:
+                return
+            self.error = None
+            self._thread = threading.Thread(target=self._run, name="dataset-download", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        try:
+            download_dataset(self.csv_path)
+        except Exception as e:
+            self.error = e
+
+
+@st.cache_resource(show_spinner=False)
+def dataset_manager():
+    return DatasetManager()
+
+
+def main():
+    # Pre-start hook: python dataset.py warms the dataset and its sidecar before serving traffic
+    parser = argparse.ArgumentParser(description="Download, verify and warm the BRFSS dataset.")
+    parser.add_argument("--path", type=Path, default=DATASET_PATH)
+    args = parser.parse_args()
+
+    download_dataset(args.path)
+    if not verify_dataset(args.path):
+        raise SystemExit(f"{args.path} does not match its recorded checksum")
+    df = read_dataset(str(args.path), source_signature(args.path))
+    print(f"{args.path}: {len(df)} rows ready, sidecar at {sidecar_path(args.path)}")
+
+
+if __name__ == "__main__":
+    main()
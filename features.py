@@ -0,0 +1,155 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+AGE_LABELS = {
+    1: "18-24", 2: "25-29", 3: "30-34", 4: "35-39", 5: "40-44",
+    6: "45-49", 7: "50-54", 8: "55-59", 9: "60-64", 10: "65-69",
+    11: "70-74", 12: "75-79", 13: "80 or older"
+}
+EDUCATION_LABELS = {
+    1: "No formal education",
+    2: "Elementary",
+    3: "Some high school",
+    4: "High school graduate",
+    5: "Some college",
+    6: "College graduate"
+}
+INCOME_LABELS = {
+    1: "Less than $10,000",
+    2: "Less than $15,000",
+    3: "Less than $20,000",
+    4: "Less than $25,000",
+    5: "Less than $35,000",
+    6: "Less than $50,000",
+    7: "Less than $75,000",
+    8: "$75,000 or more"
+}
+GEN_HEALTH_LABELS = {
+    1: "Excellent",
+    2: "Very Good",
+    3: "Good",
+    4: "Fair",
+    5: "Poor"
+}
+YES_NO_LABELS = {0: "No", 1: "Yes"}
+
+
+class Feature:
+    """One BRFSS feature: its allowed codes, how it is asked on the form and how codes read as labels.
+
+    `kind` is "float" and "int" for numbers, "category" for coded answers shown as a
+    selectbox and "bool" for yes or no questions shown as a checkbox. The label
+    lookups are built once here, so encoding and decoding never rebuild a dict.
+    """
+
+    def __init__(self, name, low, high, kind, question, labels=None, default=None, options=None):
+        self.name = name
+        self.low = low
+        self.high = high
+        self.kind = kind
+        self.question = question
+        self.labels = labels or (YES_NO_LABELS if kind == "bool" else {})
+        self.default = low if default is None else default
+        # Order the selectbox lists the codes in, when it is not simply low to high
+        self.options = options or list(self.labels)
+        self.codes = {label: code for code, label in self.labels.items()}
+        self.dtype = "float32" if kind == "float" else "uint8"
+
+    def widget(self):
+        """Draw the form input for this feature and return the value already encoded."""
+        if self.kind == "float":
+            return st.slider(self.question, float(self.low), float(self.high), float(self.default))
+        if self.kind == "int":
+            return st.slider(self.question, self.low, self.high, self.default)
+        if self.kind == "bool":
+            return int(st.checkbox(self.question, value=bool(self.default)))
+        return st.selectbox(self.question, self.options, format_func=self.labels.get)
+
+    def encode(self, value):
+        # A label becomes its code, anything else is assumed to be a code already
+        return self.codes.get(value, value)
+
+    def decode(self, code):
+        return self.labels.get(code, code)
+
+    def encode_column(self, values):
+        """Vectorized encode of a whole Series; values that are not labels are parsed as numbers (NaN if they are not)."""
+        if not self.codes or values.dtype.kind in "biuf":
+            return pd.to_numeric(values, errors="coerce")
+        return pd.to_numeric(values.map(self.codes).fillna(values), errors="coerce")
+
+    def decode_column(self, codes):
+        """Labels for a whole Series of codes as an ordered Categorical; unknown codes are shown as they are."""
+        if not self.labels:
+            return codes
+        mapped = codes.map(self.labels)
+        categories = list(self.labels.values())
+        extra = codes[mapped.isna() & codes.notna()].astype(str)
+        mapped = mapped.fillna(extra)
+        return pd.Categorical(mapped, categories=categories + sorted(set(extra) - set(categories)), ordered=True)
+
+
+# Every feature /predict takes, in the order the form asks for them and the model expects them
+FEATURE_SCHEMA = {f.name: f for f in [
+    Feature("BMI", 0, 100, "float", "BMI", default=25.0),
+    Feature("MentHlth", 0, 30, "int", "How many days in the past 30 days was your mental health not good?"),
+    Feature("PhysHlth", 0, 30, "int", "How many days in the past 30 days was your physical health not good (injury/illness)?"),
+    # 13-level age category (_AGEG5YR see codebook) 1 = 18-24 9 = 60-64 13 = 80 or older
+    Feature("Age", 1, 13, "category", "Age", AGE_LABELS),
+    # Education level (EDUCA see codebook) 1 = Never attended school or only kindergarten ... 6 = College graduate
+    Feature("Education", 1, 6, "category", "Education Level", EDUCATION_LABELS),
+    # Income scale (INCOME2 see codebook) 1 = less than $10,000 5 = less than $35,000 8 = $75,000 or more
+    Feature("Income", 1, 8, "category", "Income Level", INCOME_LABELS),
+    # 1 = excellent ... 5 = poor, the form lists it from poor to excellent
+    Feature("GenHlth", 1, 5, "category", "General Health", GEN_HEALTH_LABELS, options=[5, 4, 3, 2, 1]),
+    Feature("HighBP", 0, 1, "bool", "Do you have high blood pressure?"),
+    Feature("HighChol", 0, 1, "bool", "Do you have high cholesterol?"),
+    Feature("CholCheck", 0, 1, "bool", "Have you had your cholesterol checked in the last 5 years?"),
+    Feature("Smoker", 0, 1, "bool", "Have you smoked more than 100 cigarettes in your life?"),
+    Feature("Stroke", 0, 1, "bool", "Have you ever had a stroke?"),
+    Feature("HeartDiseaseorAttack", 0, 1, "bool", "Have you ever had a heart attack or myocardial infraction?"),
+    Feature("PhysActivity", 0, 1, "bool", "Have you had physical activity in the last 30 days excluding employment?"),
+    Feature("Fruits", 0, 1, "bool", "Do you eat fruit 1+ times a day?"),
+    Feature("Veggies", 0, 1, "bool", "Do you eat vegetables 1+ times a day?"),
+    Feature("HvyAlcoholConsump", 0, 1, "bool", "Do you drink 7+ drinks of alcohol a week?"),
+    Feature("AnyHealthcare", 0, 1, "bool", "Do you have any kind of health care coverage?"),
+    Feature("NoDocbcCost", 0, 1, "bool", "Have you neglected going to the doctor because of cost in the past 12 months?"),
+    Feature("DiffWalk", 0, 1, "bool", "Do you have serious difficulty walking or climbing a flight of stairs?"),
+    Feature("Sex", 0, 1, "bool", "Is your sex male?"),
+]}
+FEATURES = list(FEATURE_SCHEMA)
+FEATURE_RANGES = {name: (f.low, f.high) for name, f in FEATURE_SCHEMA.items()}
+FLOAT_FEATURES = [name for name, f in FEATURE_SCHEMA.items() if f.kind == "float"]
+BOOLEAN_FIELDS = [name for name, f in FEATURE_SCHEMA.items() if f.kind == "bool"]
+
+
+def form_inputs():
+    # Call inside the st.form; returns the encoded feature dict /predict expects
+    return {name: f.widget() for name, f in FEATURE_SCHEMA.items()}
+
+
+def encode_frame(df):
+    """Numeric codes for every schema column of `df`, accepting labels ("18-24", "Yes") as well as codes."""
+    encoded = df.copy()
+    for col in df.columns.intersection(FEATURES):
+        encoded[col] = FEATURE_SCHEMA[col].encode_column(df[col])
+    return encoded
+
+
+def decode_frame(df):
+    """Readable labels for every coded schema column of `df`, one vectorized map per column."""
+    decoded = df.copy()
+    for col in df.columns.intersection(FEATURES):
+        decoded[col] = FEATURE_SCHEMA[col].decode_column(df[col])
+    return decoded
+
+
+def invalid_values(encoded):
+    """Boolean frame marking every value outside its feature's range, missing, or fractional where a code is expected."""
+    low = pd.Series({col: FEATURE_SCHEMA[col].low for col in encoded.columns})
+    high = pd.Series({col: FEATURE_SCHEMA[col].high for col in encoded.columns})
+    int_cols = [col for col in encoded.columns if col not in FLOAT_FEATURES]
+    invalid = encoded.isna() | encoded.lt(low) | encoded.gt(high)
+    invalid[int_cols] |= encoded[int_cols].ne(np.round(encoded[int_cols]))
+    return invalid
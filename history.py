@@ -0,0 +1,251 @@
+import io
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import streamlit as st
+
+from api_client import api_get
+from features import decode_frame
+from store import shared_store
+
+CREATED_AT_FORMAT = "%a, %d %b %Y %H:%M:%S GMT"
+DISPLAY_TIMEZONE = "America/New_York"
+
+# Users whose decoded history this process keeps in memory; the others are reloaded from the shared store
+HISTORY_CACHE_USERS = int(os.environ.get("HISTORY_CACHE_USERS", 100))
+# How long a stored history outlives its user's last visit, in seconds
+HISTORY_TTL = int(os.environ.get("HISTORY_CACHE_TTL", 24 * 3600))
+# Stored with the frame so the ETag always matches the rows it was sent with
+ETAG_KEY = b"etag"
+
+OUTCOMES = ["Not Diabetic", "Likely Diabetic"]
+# Rows encoded per chunk when exporting, bounds the memory an export needs on top of the frame
+EXPORT_CHUNK_ROWS = 5000
+
+_history_caches_lock = threading.Lock()
+
+
+def decode_predictions(records):
+    """Decode a list of /predictions records into one DataFrame, newest first."""
+    if not records:
+        # Typed like a decoded frame, so concatenating it never loosens the real columns' dtypes
+        return pd.DataFrame({
+            "created_at": pd.to_datetime(pd.Series([], dtype=object), format=CREATED_AT_FORMAT,
+                                         utc=True).dt.tz_convert(DISPLAY_TIMEZONE),
+            "result": pd.Categorical([], categories=OUTCOMES),
+            "probability": pd.Series(dtype=float),
+            "raw_created_at": pd.Series(dtype=object),
+        })
+    raw = pd.DataFrame.from_records(records)
+    created_at = pd.to_datetime(raw["created_at"], format=CREATED_AT_FORMAT, utc=True).dt.tz_convert(DISPLAY_TIMEZONE)
+    frame = pd.DataFrame({
+        "created_at": created_at,
+        "result": pd.Categorical(np.where(raw["prediction"].astype(bool), "Likely Diabetic", "Not Diabetic"),
+                                 categories=["Not Diabetic", "Likely Diabetic"]),
+        "probability": raw["probability"].astype(float) * 100,
+        "raw_created_at": raw["created_at"],
+    })
+    if "id" in raw:
+        frame.insert(0, "id", raw["id"])
+    features = decode_frame(pd.DataFrame.from_records(raw["features"].tolist(), index=raw.index))
+    return pd.concat([frame, features], axis=1).sort_values("created_at", ascending=False, ignore_index=True)
+
+
+class HistoryTrends:
+    """Per-day prediction counts and probability sums, updated from new rows only.
+
+    Everything the trend view shows is derived from these daily totals, which
+    have one row per day however long the history is.
+    """
+
+    def __init__(self):
+        self.daily = pd.DataFrame(columns=["count", "probability_sum"] + OUTCOMES, dtype=float,
+                                  index=pd.DatetimeIndex([], name="date"))
+
+    def add(self, rows):
+        if rows.empty:
+            return
+        # Days in the display timezone, so a prediction late in the evening counts for that day
+        day = rows["created_at"].dt.tz_localize(None).dt.normalize().rename("date")
+        totals = rows.groupby(day)["probability"].agg(["size", "sum"]).set_axis(["count", "probability_sum"], axis=1)
+        outcomes = pd.crosstab(day, rows["result"].astype(str)).reindex(columns=OUTCOMES, fill_value=0)
+        self.daily = self.daily.add(totals.join(outcomes).astype(float), fill_value=0).sort_index()
+
+    def trend(self, window="7D"):
+        """Average probability per day and over a rolling `window`, weighted by the predictions on each day."""
+        rolling = self.daily[["probability_sum", "count"]].rolling(window).sum()
+        return pd.DataFrame({
+            "Daily average": self.daily["probability_sum"] / self.daily["count"],
+            f"{window} rolling average": rolling["probability_sum"] / rolling["count"],
+        })
+
+    def outcome_counts(self):
+        return self.daily[OUTCOMES].astype(int)
+
+
+class _Drain(io.RawIOBase):
+    # Write-only file that hands back what was written since the last take(), while tell() keeps counting
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def take(self):
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+
+def export_chunks(frame, fmt="csv", chunk_rows=EXPORT_CHUNK_ROWS):
+    """Yield a history frame as CSV or Parquet bytes, encoding `chunk_rows` rows at a time.
+
+    Joining the chunks gives one valid file; each Parquet chunk is a row group.
+    Only one chunk is ever encoded in memory, so callers can stream it out or
+    spool it to disk.
+    """
+    if fmt == "csv":
+        for start in range(0, max(len(frame), 1), chunk_rows):
+            yield frame.iloc[start:start + chunk_rows].to_csv(index=False, header=start == 0).encode()
+        return
+    sink = _Drain()
+    schema = pa.Schema.from_pandas(frame, preserve_index=False)
+    with pq.ParquetWriter(sink, schema) as writer:
+        for start in range(0, len(frame), chunk_rows):
+            writer.write_table(pa.Table.from_pandas(frame.iloc[start:start + chunk_rows], schema=schema,
+                                                    preserve_index=False))
+            yield sink.take()
+    yield sink.take()
+
+
+def export_file(frame, fmt="csv"):
+    # The whole export as a BytesIO, one of the types Streamlit's deferred download_button accepts;
+    # it reads the file into bytes anyway, so only the encoding is worth doing chunk by chunk
+    buffer = io.BytesIO()
+    for chunk in export_chunks(frame, fmt):
+        buffer.write(chunk)
+    buffer.seek(0)
+    return buffer
+
+
+def unseen_rows(new_rows, frame):
+    """The rows of a fresh /predictions response that are not in the cached `frame` yet.
+
+    With record ids that is every id we do not have. Without them, everything older
+    than our newest row is already cached and everything newer is new. At that
+    boundary second, identical predictions are legitimate, so only as many copies of
+    each as the cache already holds are dropped.
+    """
+    if "id" in new_rows and "id" in frame:
+        return new_rows[~new_rows["id"].isin(frame["id"])]
+
+    newest = frame["created_at"].iloc[0]
+    key = ["result", "probability"]
+    boundary = new_rows[new_rows["created_at"] == newest]
+    cached = frame[frame["created_at"] == newest].groupby(key, observed=True).size().rename("cached")
+    # Number each boundary row among its identical copies, the first `cached` copies are the ones we have
+    copies = boundary[key].assign(copy=boundary.groupby(key, observed=True).cumcount()).join(cached, on=key)
+    already_cached = new_rows.index.isin(copies.index[copies["copy"] < copies["cached"].fillna(0)])
+    return new_rows[(new_rows["created_at"] >= newest) & ~already_cached]
+
+
+class HistoryCache:
+    """One user's decoded prediction history, synced incrementally with the backend.
+
+    With a `store`, the frame and its ETag are kept there as Parquet after every
+    change, so another replica (or this one after evicting the user) starts from
+    them instead of downloading the whole history again.
+    """
+
+    def __init__(self, user=None, store=None):
+        self.user = user
+        self.store = store
+        self.frame = decode_predictions([])
+        self.etag = None
+        self.trends = HistoryTrends()
+        self.lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        data = self.store.get("history", self.user) if self.store is not None else None
+        if data is None:
+            return
+        table = pq.read_table(io.BytesIO(data))
+        self.etag = (table.schema.metadata or {}).get(ETAG_KEY, b"").decode() or None
+        self.frame = table.to_pandas()
+        self.trends.add(self.frame)
+
+    def _save(self):
+        if self.store is None or self.frame.empty:
+            return
+        table = pa.Table.from_pandas(self.frame, preserve_index=False)
+        metadata = dict(table.schema.metadata or {})
+        if self.etag:
+            metadata[ETAG_KEY] = self.etag.encode()
+        buffer = io.BytesIO()
+        pq.write_table(table.replace_schema_metadata(metadata), buffer)
+        self.store.set("history", self.user, buffer.getvalue(), ttl=HISTORY_TTL)
+
+    @property
+    def last_created_at(self):
+        return self.frame["raw_created_at"].iloc[0] if len(self.frame) else None
+
+    def sync(self, token):
+        """Fetch only what changed since the last sync and merge it in.
+
+        Sends the stored ETag and the newest timestamp we have; a 304 costs nothing,
+        and rows a backend sends again (`since` is inclusive, or ignored) are dropped.
+        Returns the response so callers can report errors.
+        """
+        with self.lock:
+            headers = {"If-None-Match": self.etag} if self.etag else {}
+            params = {"since": self.last_created_at} if self.last_created_at else {}
+            response = api_get("/predictions", token=token, headers=headers, params=params)
+            # 304 means nothing new, anything else but 200 is left for the caller to report
+            if response.status_code != 200:
+                return response
+
+            new_rows = decode_predictions(response.json())
+            if len(self.frame):
+                # Rows we already have are dropped before the trends see them, so nothing is counted twice
+                new_rows = unseen_rows(new_rows, self.frame)
+                # Nothing new is the usual answer to `since`, and then the frame is left exactly as it is
+                if len(new_rows):
+                    merged = pd.concat([new_rows, self.frame], ignore_index=True)
+                    self.frame = merged.sort_values("created_at", ascending=False, ignore_index=True)
+            else:
+                self.frame = new_rows.reset_index(drop=True)
+            self.trends.add(new_rows)
+            self.etag = response.headers.get("ETag")
+            self._save()
+            return response
+
+
+@st.cache_resource(show_spinner=False)
+def _history_caches():
+    return OrderedDict()
+
+
+def history_cache(user):
+    """The user's HistoryCache; only the HISTORY_CACHE_USERS most recent users stay in memory."""
+    caches = _history_caches()
+    with _history_caches_lock:
+        cache = caches.pop(user, None) or HistoryCache(user, shared_store())
+        caches[user] = cache
+        while len(caches) > HISTORY_CACHE_USERS:
+            caches.popitem(last=False)
+    return cache
@@ -0,0 +1,116 @@
+import os
+
+import numpy as np
+import streamlit as st
+
+from features import FEATURES
+from dataset import DATASET_PATH, load_dataset, dataset_fingerprint
+from data_stats import TARGET_COLUMN
+
+# How the Predict page scores: only the backend, only the local model,
+# the local model when the backend is too slow, or both with the differences reported
+ENGINE_MODES = ["Remote", "Local", "Fallback", "Shadow"]
+DEFAULT_ENGINE_MODE = os.environ.get("PREDICT_ENGINE", "Remote")
+# Read timeout for the backend call in fallback mode, in seconds
+FALLBACK_TIMEOUT = float(os.environ.get("PREDICT_FALLBACK_TIMEOUT", 5))
+# Shadow mode flags a disagreement when the labels differ or the probabilities are this far apart
+SHADOW_TOLERANCE = 0.1
+
+
+class LocalModel:
+    """Logistic regression over the Predict form's features, scored with plain NumPy."""
+
+    def __init__(self, mean, scale, coef, intercept):
+        self.mean = mean
+        self.scale = scale
+        self.coef = coef
+        self.intercept = intercept
+        # Coefficients folded with the standardization so scoring is a single dot product
+        self._weights = coef / scale
+        self._bias = intercept - np.dot(self._weights, mean)
+
+    @classmethod
+    def fit(cls, X, y, iterations=25, l2=1e-4):
+        # Newton's method (IRLS) on standardized features, converges in a handful of steps here
+        X = np.asarray(X, dtype=float)
+        y = np.asarray(y, dtype=float)
+        mean = X.mean(axis=0)
+        scale = X.std(axis=0)
+        scale[scale == 0] = 1.0
+        Z = np.hstack([np.ones((len(X), 1)), (X - mean) / scale])
+        beta = np.zeros(Z.shape[1])
+        penalty = l2 * len(X) * np.eye(Z.shape[1])
+        penalty[0, 0] = 0
+        for _ in range(iterations):
+            p = 1 / (1 + np.exp(-Z @ beta))
+            gradient = Z.T @ (p - y) + penalty @ beta
+            hessian = (Z * (p * (1 - p))[:, None]).T @ Z + penalty
+            step = np.linalg.solve(hessian, gradient)
+            beta -= step
+            if np.abs(step).max() < 1e-8:
+                break
+        return cls(mean, scale, beta[1:], beta[0])
+
+    def predict_proba(self, X):
+        """Probabilities for a 2D array or DataFrame with the columns in FEATURES order."""
+        X = np.asarray(X[FEATURES] if hasattr(X, "columns") else X, dtype=float)
+        return 1 / (1 + np.exp(-(X @ self._weights + self._bias)))
+
+    def predict_one(self, features):
+        # Same shape as the /predict response so the page can treat both alike
+        z = self._bias + sum(w * features[name] for w, name in zip(self._weights.tolist(), FEATURES))
+        probability = 1 / (1 + np.exp(-z))
+        return {"isDiabetes": bool(probability >= 0.5), "probability": float(probability), "engine": "local"}
+
+    def compare(self, local, remote):
+        """True when the local and the server's result disagree on the outcome or beyond SHADOW_TOLERANCE."""
+        return (local["isDiabetes"] != bool(remote["isDiabetes"])
+                or abs(local["probability"] - float(remote["probability"])) > SHADOW_TOLERANCE)
+
+    def save(self, path, fingerprint):
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, mean=self.mean, scale=self.scale, coef=self.coef,
+                 intercept=self.intercept, fingerprint=fingerprint)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, fingerprint):
+        with np.load(path) as data:
+            if str(data["fingerprint"]) != fingerprint:
+                return None
+            return cls(data["mean"], data["scale"], data["coef"], float(data["intercept"]))
+
+
+def model_path(csv_path=DATASET_PATH):
+    return csv_path.with_name(csv_path.stem + "_model.npz")
+
+
+@st.cache_resource(show_spinner="Training the local model...", max_entries=1)
+def _local_model(csv_path, fingerprint):
+    path = model_path(csv_path)
+    if path.exists():
+        try:
+            model = LocalModel.load(path, fingerprint)
+        except (OSError, KeyError, ValueError):
+            model = None
+        if model is not None:
+            return model
+
+    df = load_dataset(csv_path)
+    model = LocalModel.fit(df[FEATURES], df[TARGET_COLUMN])
+    try:
+        model.save(path, fingerprint)
+    except OSError:
+        pass
+    return model
+
+
+def local_model(csv_path=DATASET_PATH):
+    """The in-process model for the current dataset, or None when the dataset is not available."""
+    if not csv_path.exists():
+        return None
+    try:
+        return _local_model(csv_path, dataset_fingerprint(csv_path))
+    except ValueError:
+        # The file failed its checksum or schema checks, Data Exploration shows why
+        return None
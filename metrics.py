@@ -0,0 +1,133 @@
+import bisect
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+# Histogram bucket upper bounds in seconds, the same layout Prometheus clients use by default
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float("inf"))
+
+# Where export_metrics() writes when no path is given
+EXPORT_PATH = Path(os.environ.get("METRICS_EXPORT_PATH", "metrics.prom"))
+
+# Comma separated e-mails allowed to open the operations page
+ADMIN_EMAILS = {email.strip() for email in os.environ.get("ADMIN_EMAILS", "").split(",") if email.strip()}
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def quantile(self, q):
+        # Upper bound of the bucket holding the q-th observation, good enough for spotting a bottleneck
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(BUCKETS, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+
+class MetricsRegistry:
+    """Latency histograms and counters per (page, name), shared by every session."""
+
+    def __init__(self):
+        self.histograms = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+
+    def observe(self, page, name, seconds):
+        with self._lock:
+            self.histograms.setdefault((page, name), Histogram()).observe(seconds)
+
+    def increment(self, page, name, amount=1):
+        with self._lock:
+            self.counters[(page, name)] = self.counters.get((page, name), 0) + amount
+
+    def counter(self, page, name):
+        with self._lock:
+            return self.counters.get((page, name), 0)
+
+    def snapshot(self):
+        """Plain dicts of everything recorded so far, safe to render or serialize."""
+        with self._lock:
+            timings = [
+                {
+                    "page": page,
+                    "name": name,
+                    "count": h.count,
+                    "mean": h.total / h.count if h.count else 0.0,
+                    "p50": h.quantile(0.5),
+                    "p95": h.quantile(0.95),
+                    "max": h.max,
+                    "buckets": list(h.counts),
+                }
+                for (page, name), h in sorted(self.histograms.items())
+            ]
+            counters = [{"page": page, "name": name, "value": value}
+                        for (page, name), value in sorted(self.counters.items())]
+        return {"timings": timings, "counters": counters}
+
+    def to_prometheus(self):
+        snapshot = self.snapshot()
+        lines = ["# TYPE app_latency_seconds histogram"]
+        for timing in snapshot["timings"]:
+            labels = f'page="{timing["page"]}",name="{timing["name"]}"'
+            cumulative = 0
+            for bound, count in zip(BUCKETS, timing["buckets"]):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'app_latency_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f"app_latency_seconds_sum{{{labels}}} {timing['mean'] * timing['count']}")
+            lines.append(f"app_latency_seconds_count{{{labels}}} {timing['count']}")
+        lines.append("# TYPE app_events_total counter")
+        for counter in snapshot["counters"]:
+            lines.append(f'app_events_total{{page="{counter["page"]}",name="{counter["name"]}"}} {counter["value"]}')
+        return "\n".join(lines) + "\n"
+
+    def to_json(self):
+        return json.dumps(self.snapshot(), indent=2)
+
+
+@st.cache_resource(show_spinner=False)
+def metrics():
+    return MetricsRegistry()
+
+
+@contextmanager
+def timed(page, name):
+    """Record how long the block takes under (page, name), and count it if it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        metrics().increment(page, f"{name}_errors")
+        raise
+    finally:
+        metrics().observe(page, name, time.perf_counter() - start)
+
+
+def export_metrics(path=EXPORT_PATH):
+    """Write the current metrics to `path`, as JSON for a .json file and Prometheus text otherwise."""
+    path = Path(path)
+    text = metrics().to_json() if path.suffix == ".json" else metrics().to_prometheus()
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(text)
+    tmp_path.replace(path)
+    return path
@@ -1,21 +1,35 @@
+import time
 import streamlit as st
-from ucimlrepo import fetch_ucirepo
-import pandas as pd
-from matplotlib import pyplot as plt
-from pathlib import Path
-import os
-
-# Unless the user is logged in, they will not be able to view this page
-token = st.session_state.get("access_token", "")
-if not token:
-    st.error("❌ Oops! You need to be logged in first.")
-    st.stop()
+import startup
+import session
+
+session.require_login()
 
 st.set_page_config(
     page_title="Group 1 COMP377",
     page_icon="👾",
 )
 
+# Everything below the login check is only imported for users who can see the page
+import pandas as pd
+from dataset import DATASET_PATH, dataset_manager, load_dataset, dataset_fingerprint, memory_usage
+from data_stats import column_summary, column_box_summary, column_histogram, box_summary_table
+from metrics import metrics, timed
+from chunked import use_chunked, chunked_aggregates
+from cohort import cohort_cube, COHORT_DIMENSIONS
+from features import AGE_LABELS, EDUCATION_LABELS, INCOME_LABELS
+from charts import category_bars, histogram_bars, box_plot
+
+COHORT_LABELS = {
+    "Age": AGE_LABELS,
+    "Education": EDUCATION_LABELS,
+    "Income": INCOME_LABELS,
+    "Sex": {0: "Female", 1: "Male"},
+    "HighBP": {0: "No high blood pressure", 1: "High blood pressure"},
+}
+
+rerun_start = time.perf_counter()
+
 st.write("# Data Exploration!")
 st.write('A little bit about this dataset: This dataset is from the CDC and contains health indicators for diabetes.'
          ' It has information from all states and territories in the US in 2021 as part of The Behavioral Risk Factor Surveillance System'
@@ -24,100 +38,98 @@ st.write('A little bit about this dataset: This dataset is from the CDC and cont
 st.sidebar.success("Go back to the landing page, check out your history, or make predictions")
 
 # fetch dataset (first try local CSV, fallback to UCI ML repo)
-df_path = Path("diabetes_012_health_indicators_BRFSS2015.csv")
+df_path = DATASET_PATH
 
-if df_path.exists():
-    df = pd.read_csv(df_path)
-    st.write("✅ Loaded dataset from local CSV.")
-else:
-    st.write("📡 Downloading dataset from UCI ML Repo. This may take a few seconds...")
+chunked_mode = df_path.exists() and use_chunked(df_path)
+
+if chunked_mode:
+    # Too big to hold in memory, so every section below reads from merged per-chunk aggregates
     try:
-        cdc_diabetes_health_indicators = fetch_ucirepo(id=891)
-        df = cdc_diabetes_health_indicators.data.original
-        df.to_csv(df_path, index=False)
-        st.write("📥 Dataset downloaded and saved locally for future runs.")
-    except Exception as e:
-        st.error("❌ Failed to load dataset from both local file and UCI ML Repo.")
+        with timed("Data_Exploration", "dataset_load"):
+            aggregates = chunked_aggregates(str(df_path), dataset_fingerprint(df_path))
+    except ValueError as e:
+        st.error(f"❌ The local dataset does not look right: {e}")
         st.stop()
+    st.write(f"✅ Read {aggregates.rows:,} rows from the local CSV in chunks.")
+elif df_path.exists():
+    try:
+        with timed("Data_Exploration", "dataset_load"):
+            df = load_dataset(df_path)
+    except ValueError as e:
+        st.error(f"❌ The local dataset does not look right: {e}")
+        st.stop()
+    st.write("✅ Loaded dataset from local CSV.")
+else:
+    # The download runs in the background, this session just polls until the file is in place
+    manager = dataset_manager()
+    if manager.error is None:
+        manager.start()
+
+    @st.fragment(run_every=2)
+    def wait_for_dataset():
+        if manager.ready:
+            st.rerun()
+        elif manager.error is not None:
+            st.error("❌ Failed to load dataset from both local file and UCI ML Repo.")
+            if st.button("Try again"):
+                manager.start()
+        else:
+            st.write("📡 Downloading dataset from UCI ML Repo. This may take a few seconds...")
+
+    wait_for_dataset()
+    st.stop()
 # data (as pandas dataframes)
 with st.container():
     st.write("## Dataframe null check:")
-    st.write(df.isnull().sum())
+    st.write(aggregates.nulls if chunked_mode else df.isnull().sum())
 
 st.write("We have no missing values in our dataset, so we can proceed to look a bit closer at it.")
 
 st.write("## Dataframe head:")
-st.write(df.head())
+st.write(aggregates.head if chunked_mode else df.head())
 
 st.write("## Dataframe Types:")
-st.write(df.dtypes)
+st.write((aggregates.dtypes if chunked_mode else df.dtypes).astype(str))
+if not chunked_mode:
+    st.write(f"Stored with these compact types, the whole dataset takes {memory_usage(df) / 1e6:.1f} MB in memory.")
 
 st.write("We can also see by this that the types of data are all numerical, so no real need to process them from\n"
 "strings or objects etc. So we can continue on from this. But, it should be noted there are some categorical values\n"
 "such as 'Education_Level' and 'Income_Level', so we should be mindful of this when looking at the data.")
 
-cols = [col for col in df.columns if col not in ['Diabetes_binary', 'ID']]
+fingerprint = dataset_fingerprint(df_path)
 
-df_median = pd.DataFrame(columns=[cols])
 
-st.write("## What is the median person?")
-for col in cols:
-    df_median.at[0, col] = round(df[col].median(), 7)
+def value_counts(column):
+    return aggregates.value_counts[column] if chunked_mode else df[column].value_counts()
+
+with timed("Data_Exploration", "stats"):
+    summary = aggregates.column_summary() if chunked_mode else column_summary(df, fingerprint)
+
+df_median = summary[["median"]].round(7)
 
-st.table(df_median.T)
+st.write("## What is the median person?")
+st.table(df_median)
 
 st.write("The median person is a man with healthcare coverage, no extreme health issues and is between 55 and 59 years old,"
          " with a BMI of 27.0, eats fruit and vegetables 1+ times a day, has a high school education, and an income of "
          "between \$50,000 and \$75,000 USD")
 
-correlations = {}
-
-for col in cols:
-    correlations[col] = df[col].corr(df['Diabetes_binary'])  # Lets add this to a dictionary to take a closer look
-
-weak_correlation = {}
-medium_correlation = {}
-strong_correlation = {}
-
-for key in correlations:
-    if correlations[key] > 0.2 or correlations[key] < -0.2:
-        strong_correlation[key] = correlations[key]
-    elif correlations[key] > 0.1 or correlations[key] < -0.1:
-        medium_correlation[key] = correlations[key]
-    else:
-        weak_correlation[key] = correlations[key]
-
 st.write("## A closer look at the data:")
 with st.container():
 
     stats = st.checkbox("Show more stats")
 
-    with st.expander("Strong correlations:"):
-        for key in strong_correlation:
-            st.write(f"{key} has a correlation of {strong_correlation[key]}")
-            if stats:
-                st.write(f"{key} has a mean of {round(df[key].mean(), 7)} and a standard deviation of {round(df[key].std(), 7)}")
-                st.write(f"{key} has a min of {round(df[key].min(), 7)} and a max of {round(df[key].max(), 7)}")
-            if key != list(strong_correlation)[-1]:
-                st.divider()
-
-    with st.expander("Medium correlations:"):
-        for key in medium_correlation:
-            st.write(f"{key} has a correlation of {medium_correlation[key]}")
-            if stats:
-                st.write(f"{key} has a mean of {round(df[key].mean(), 7)} and a standard deviation of {round(df[key].std(), 7)}")
-                st.write(f"{key} has a min of {round(df[key].min(), 7)} and a max of {round(df[key].max(), 7)}")
-            if key != list(medium_correlation)[-1]:
-                st.divider()
-
-    with st.expander("Weak correlations:"):
-        for key in weak_correlation:
-            st.write(f"{key} has a correlation of {weak_correlation[key]}")
-            if stats:
-                st.write(f"{key} has a mean of {round(df[key].mean(), 7)} and a standard deviation of {round(df[key].std(), 7)}")
-                st.write(f"{key} has a min of {round(df[key].min(), 7)} and a max of {round(df[key].max(), 7)}")
-            if key != list(weak_correlation)[-1]:
-                st.divider()
+    for strength in ["strong", "medium", "weak"]:
+        with st.expander(f"{strength.capitalize()} correlations:"):
+            bucket = summary[summary["strength"] == strength]
+            for key, row in bucket.iterrows():
+                st.write(f"{key} has a correlation of {row['correlation']}")
+                if stats:
+                    st.write(f"{key} has a mean of {round(row['mean'], 7)} and a standard deviation of {round(row['std'], 7)}")
+                    st.write(f"{key} has a min of {round(row['min'], 7)} and a max of {round(row['max'], 7)}")
+                if key != bucket.index[-1]:
+                    st.divider()
 
     st.write("The general conclusion is that generally stronger indicators of physical health are "
              "more likely to be correlated directly with diabetes or lack thereof, followed by education or income and then life style." \
@@ -125,61 +137,87 @@ with st.container():
              "as reliable as the others.")
 
 st.write("## Outlier Detection in BMI:")
-fig, ax = plt.subplots()
-ax.boxplot(df["BMI"])
-ax.set_title(f"Boxplot for BMI Outliers")
-st.pyplot(fig)
+
+
+with timed("Data_Exploration", "box_summary"):
+    bmi_summary = aggregates.box_summary("BMI") if chunked_mode else column_box_summary(df, fingerprint, "BMI")
+    bmi_edges, bmi_counts = aggregates.histogram("BMI") if chunked_mode else column_histogram(df, fingerprint, "BMI")
+
+# Only the summaries go to the browser, which draws the charts itself
+st.altair_chart(box_plot(bmi_summary, "Boxplot for BMI Outliers", "BMI"))
+st.write(f"{bmi_summary['outliers']} of the {bmi_summary['count']} BMI values are outliers:")
+st.table(box_summary_table(bmi_summary))
 st.write("As we can see from the boxplot, there are a some outliers in the BMI column. We used this column because " \
          "it is a good indicator of health and is also continuous, as opposed to a boolean or categorical value.")
+st.altair_chart(histogram_bars(bmi_edges, bmi_counts, "BMI distribution", "BMI"))
+
+# The cube already holds counts and diabetes rates per category, in both loading modes
+with timed("Data_Exploration", "cohort_cube"):
+    cube = aggregates.cube if chunked_mode else cohort_cube(df, fingerprint)
+
+
+def distribution_charts(column, title):
+    labels = COHORT_LABELS[column]
+    count_column, rate_column = st.columns(2)
+    count_column.altair_chart(category_bars(cube.distribution(column), labels, f"{title} distribution", title))
+    rate_column.altair_chart(category_bars(cube.diabetes_rate(column), labels, f"Diabetes rate by {title.lower()}",
+                                           title, y_title="Diabetes rate", percent=True))
 
-# New section added between the two charts
 
 st.write("## Age distribution:")
-age_counts = df['Age'].value_counts().sort_index()
-x = ["18-24", "25-29", "30-34", "35-39", "40-44", "45-49", "50-54", "55-59", "60-64", "65-69", "70-74", "75-79", "80+"]
-y = age_counts.values
-fig, ax = plt.subplots()
-ax.bar(x, y)
-ax.set_title("Age distribution")
-ax.set_xlabel("Age")
-ax.set_ylabel("Count")
-ax.set_xticks(range(len(x)))
-ax.set_xticklabels(x, rotation=45, ha='right', fontsize=10)
-st.pyplot(fig)
+distribution_charts("Age", "Age")
 
 st.write("## Education distribution:")
-age_counts = df['Education'].value_counts().sort_index()
-x = ["No formal education", "Elementary", "Some high school", "High school graduate", "Some college", "College graduate"]
-y = age_counts.values
-fig, ax = plt.subplots()
-ax.bar(x, y)
-ax.set_title("Education distribution")
-ax.set_xlabel("Education Level")
-ax.set_ylabel("Count")
-ax.set_xticks(range(len(x)))
-ax.set_xticklabels(x, rotation=45, ha='right', fontsize=10)
-st.pyplot(fig)
+distribution_charts("Education", "Education Level")
 
 st.write("Education distribution table, lower the number corresponds to lower education:")
-edu_table = df['Education'].value_counts()
+edu_table = value_counts('Education').sort_values(ascending=False)
 st.table(edu_table)
 
 st.write("## Income distribution:")
-age_counts = df['Income'].value_counts().sort_index()
-x = ["Less than $10,000", "Less than $15,000", "Less than $20,000", "Less than $25,000", "Less than $35,000", "Less than $50,000", "Less than $75,000", "$75,000 or more"]
-y = age_counts.values
-fig, ax = plt.subplots()
-ax.bar(x, y)
-ax.set_title("Income distribution")
-ax.set_xlabel("Income Level")
-ax.set_ylabel("Count")
-ax.set_xticks(range(len(x)))
-ax.set_xticklabels(x, rotation=45, ha='right', fontsize=10)
-st.pyplot(fig)
-
-if st.session_state.is_logged_in:
-    if st.sidebar.button("Logout"):
-        st.session_state.access_token = None
-        st.session_state.user_email = None
-        st.session_state.is_logged_in = False
-        st.success("✅ Logged out successfully.")
+distribution_charts("Income", "Income Level")
+
+st.write("## Explore a cohort:")
+st.write("Pick any mix of groups below and the numbers update for just those people. Leave a filter empty to keep everyone.")
+
+filters = {}
+filter_columns = st.columns(3)
+for i, dimension in enumerate(COHORT_DIMENSIONS):
+    labels = COHORT_LABELS[dimension]
+    filters[dimension] = filter_columns[i % 3].multiselect(dimension, list(labels), format_func=labels.get)
+
+with timed("Data_Exploration", "cohort_query"):
+    cohort_size = cube.size(filters)
+    if cohort_size:
+        cohort_rate = cube.diabetes_rate(filters=filters)
+        cohort_correlations = cube.correlations(filters)
+        cohort_tables = {}
+        for column in ["Age", "Education", "Income"]:
+            labels = COHORT_LABELS[column]
+            cohort_tables[column] = pd.DataFrame({
+                "Count": cube.distribution(column, filters),
+                "Diabetes rate": cube.diabetes_rate(column, filters),
+            }).rename(index=labels)
+
+if not cohort_size:
+    st.info("No one in the dataset matches all of these filters.")
+else:
+    metric_columns = st.columns(2)
+    metric_columns[0].metric("People in this cohort", f"{cohort_size:,}")
+    metric_columns[1].metric("Diabetes rate", f"{cohort_rate:.1%}")
+
+    for tab, (column, table) in zip(st.tabs(list(cohort_tables)), cohort_tables.items()):
+        with tab:
+            st.bar_chart(table["Count"], sort=False, x_label=column, y_label="Count")
+            st.bar_chart(table["Diabetes rate"], sort=False, x_label=column, y_label="Diabetes rate")
+
+    with st.expander("Correlations in this cohort:"):
+        for strength in ["strong", "medium", "weak"]:
+            keys = cohort_correlations.index[cohort_correlations["strength"] == strength]
+            st.write(f"**{strength.capitalize()}:** " + (", ".join(
+                f"{key} ({cohort_correlations.at[key, 'correlation']:.3f})" for key in keys) or "none"))
+
+metrics().observe("Data_Exploration", "rerun", time.perf_counter() - rerun_start)
+startup.first_render("Data_Exploration")
+
+session.logout_button()
@@ -0,0 +1,64 @@
+import streamlit as st
+import startup
+import session
+from metrics import metrics, export_metrics, ADMIN_EMAILS, EXPORT_PATH
+
+session.require_login()
+
+# Only the accounts listed in ADMIN_EMAILS can see how the app is doing
+if st.session_state.get("user_email") not in ADMIN_EMAILS:
+    st.error("❌ This page is only available to administrators.")
+    st.stop()
+
+st.set_page_config(
+    page_title="Operations - Group 1 COMP377",
+    page_icon="📈",
+)
+
+import pandas as pd
+from prediction_cache import prediction_cache
+
+st.title("Operations")
+st.write("Timings are in seconds and cover every session served by this process since it started.")
+
+registry = metrics()
+snapshot = registry.snapshot()
+
+st.write("## Latency")
+if snapshot["timings"]:
+    timings = pd.DataFrame(snapshot["timings"]).drop(columns=["buckets"])
+    st.dataframe(timings, hide_index=True)
+else:
+    st.info("Nothing has been timed yet.")
+
+st.write("## Counters")
+if snapshot["counters"]:
+    st.dataframe(pd.DataFrame(snapshot["counters"]), hide_index=True)
+else:
+    st.info("Nothing has been counted yet.")
+
+st.write("## Caches")
+predictions = prediction_cache()
+st.metric("Prediction cache hit rate", f"{predictions.hit_rate:.0%}", help=f"{predictions.hits} hits, {predictions.misses} misses")
+
+st.write("## Startup")
+first_renders = startup.first_renders()
+if first_renders:
+    st.dataframe(pd.Series(first_renders, name="seconds after process start").rename_axis("page").reset_index(),
+                 hide_index=True)
+if startup.import_timer is not None:
+    imports, import_total = startup.import_timer.report()
+    st.write(f"{import_total:.2f}s spent importing modules, the slowest were:")
+    st.dataframe(pd.DataFrame(imports), hide_index=True)
+else:
+    st.caption("Set STARTUP_PROFILE=1 to time every module import as well.")
+
+st.write("## Export")
+st.download_button("Download Prometheus metrics", registry.to_prometheus(), file_name="metrics.prom", mime="text/plain")
+st.download_button("Download JSON metrics", registry.to_json(), file_name="metrics.json", mime="application/json")
+if st.button(f"Write metrics to {EXPORT_PATH}"):
+    st.success(f"✅ Metrics written to {export_metrics()}")
+
+startup.first_render("Operations")
+
+session.logout_button()
@@ -1,144 +1,183 @@
-import requests
+import time
 import streamlit as st
+import startup
+import session
 
-
-# Unless the user is logged in, they will not be able to view this page
-token = st.session_state.get("access_token", "")
-if not token:
-    st.error("❌ Oops! You need to be logged in first.")
-    st.stop()
+token = session.require_login()
 
 st.set_page_config(
     page_title="Group 1 COMP377",
     page_icon="🔮",
 )
 
+# Everything below the login check is only imported for users who can see the page
+import requests
+from api_client import api_post, CONNECT_TIMEOUT
+from prediction_cache import prediction_cache
+from metrics import metrics
+from local_model import local_model, ENGINE_MODES, DEFAULT_ENGINE_MODE, FALLBACK_TIMEOUT
+from features import FEATURES, FLOAT_FEATURES, form_inputs
+from batch import read_batch_file, validate_batch, score_batch, batch_results
+from whatif import SUGGESTED_FEATURES, build_grid, run_sweep, heatmap_data
+
+rerun_start = time.perf_counter()
+
 st.sidebar.success("Go back to the landing page, look at your history, or examine our data")
 
 st.write("# Predict on our model with the form below!")
 
+engine = st.sidebar.selectbox("Scoring engine", ENGINE_MODES, index=ENGINE_MODES.index(DEFAULT_ENGINE_MODE),
+                              help="Remote uses our server, Local scores in the app, Fallback answers locally when "
+                                   "the server is slow, and Shadow uses the server but compares it with the local model.")
+
 with st.form("my_form"):
     st.write("Notes:")
     st.write("A checkbox indicates a 'Yes' to a yes or no answer. ")
 
 
-    bmi_val = st.slider("BMI", 0.0, 100.0, 25.0)
-    mental_health_val = st.slider("How many days in the past 30 days was your mental health not good?", 0, 30, 0)
-    physical_health_val = st.slider("How many days in the past 30 days was your physical health not good (injury/illness)?", 0, 30, 0)
-    # 13-level age category (_AGEG5YR see codebook) 1 = 18-24 9 = 60-64 13 = 80 or older
-    age_val = st.selectbox("Age", ["18-24", "25-29", "30-34", "35-39", "40-44", "45-49", "50-54", "55-59", "60-64", "65-69", "70-74", "75-79", "80 or older"])
-    # Education level (EDUCA see codebook) scale 1-6 1 = Never attended school or only kindergarten 2 = Grades 1 through 8 (Elementary) 3 = Grades 9 through 11 (Some high school) 4 = Grade 12 or GED (High school graduate) 5 = College 1 year to 3 years (Some college or technical school) 6 = College 4 years or more (College graduate)
-    education_val = st.selectbox("Education Level", ["No formal education", "Elementary", "Some high school", "High school graduate", "Some college", "College graduate"])
-    # Income scale (INCOME2 see codebook) scale 1-8 1 = less than $10,000 5 = less than $35,000 8 = $75,000 or more
-    income_val = st.selectbox("Income Level", ["Less than $10,000", "Less than $15,000", "Less than $20,000", "Less than $25,000", "Less than $35,000", "Less than $50,000", "Less than $75,000", "$75,000 or more"])
-    # scale 1-5 1 = excellent 2 = very good 3 = good 4 = fair 5 = poor
-    gen_health_val = st.selectbox("General Health", ["Poor", "Fair", "Good", "Very Good", "Excellent"])
-
-
-    high_bp_val = st.checkbox("Do you have high blood pressure?")
-    high_chol_val = st.checkbox("Do you have high cholesterol?")
-    chol_check_val = st.checkbox("Have you had your cholesterol checked in the last 5 years?")
-    smoking_val = st.checkbox("Have you smoked more than 100 cigarettes in your life?")
-    stroke_val = st.checkbox("Have you ever had a stroke?")
-    heart_val = st.checkbox("Have you ever had a heart attack or myocardial infraction?")
-    phys_activity_val = st.checkbox("Have you had physical activity in the last 30 days excluding employment?")
-    fruits_val = st.checkbox("Do you eat fruit 1+ times a day?")
-    veggies_val = st.checkbox("Do you eat vegetables 1+ times a day?")
-    hvy_alc_val = st.checkbox("Do you drink 7+ drinks of alcohol a week?")
-    any_health_val = st.checkbox("Do you have any kind of health care coverage?")
-    no_doc_cost_val = st.checkbox("Have you neglected going to the doctor because of cost in the past 12 months?")
-    walking_val = st.checkbox("Do you have serious difficulty walking or climbing a flight of stairs?")
-    gender_val = st.checkbox("Is your sex male?")
+    # The schema draws one input per feature, in the order the model expects
+    input_data = form_inputs()
 
     # Every form must have a submit button.
     submitted = st.form_submit_button("Submit")
     if submitted:
-        # Maps the user input to the format that's expected by our model
-        input_data = {
-            "BMI": bmi_val,
-            "MentHlth": mental_health_val,
-            "PhysHlth": physical_health_val,
-            "Age": {
-                "18-24" : 1,
-                "25-29" : 2,
-                "30-34" : 3,
-                "35-39" : 4,
-                "40-44" : 5,
-                "45-49" : 6,
-                "50-54" : 7,
-                "55-59" : 8,
-                "60-64" : 9,
-                "65-69" : 10,
-                "70-74" : 11,
-                "75-79" : 12,
-                "80 or older" : 13
-            }[age_val],
-            "Education": {
-                "No formal education": 1,
-                "Elementary": 2,
-                "Some high school": 3,
-                "High school graduate": 4,
-                "Some college": 5,
-                "College graduate": 6
-            }[education_val],
-            "Income": {
-                "Less than $10,000" : 1,
-                "Less than $15,000" : 2,
-                "Less than $20,000" : 3,
-                "Less than $25,000" : 4,
-                "Less than $35,000" : 5,
-                "Less than $50,000" : 6,
-                "Less than $75,000" : 7,
-                "$75,000 or more" : 8
-            }[income_val],
-            "GenHlth": {
-                "Excellent": 1,
-                "Very Good": 2,
-                "Good": 3,
-                "Fair": 4,
-                "Poor": 5
-            }[gen_health_val],
-            "HighBP": int(high_bp_val),
-            "HighChol": int(high_chol_val),
-            "CholCheck": int(chol_check_val),
-            "Smoker": int(smoking_val),
-            "Stroke": int(stroke_val),
-            "HeartDiseaseorAttack": int(heart_val),
-            "PhysActivity": int(phys_activity_val),
-            "Fruits": int(fruits_val),
-            "Veggies": int(veggies_val),
-            "HvyAlcoholConsump": int(hvy_alc_val),
-            "AnyHealthcare": int(any_health_val),
-            "NoDocbcCost": int(no_doc_cost_val),
-            "DiffWalk": int(walking_val),
-            "Sex": int(gender_val)
-        }
-
         # Get the JWT token from the session
         token = st.session_state.get("access_token", "")
         if not token:
             st.error("❌ No JWT token found. Please log in first.")
             st.stop()
 
-        response = requests.post(
-            "https://group1-comp377-groupproject-1.onrender.com/predict",
-            headers={"Authorization": f"Bearer {token}"},
-            json=input_data
-        )
-
-        print(f"Response Status Code: {response.status_code}")
-        print(f"Response Content: {response.text}")
+        model = local_model() if engine != "Remote" else None
+        if engine != "Remote" and model is None:
+            st.warning("⚠️ The local model needs the dataset, open the Data Exploration page once. Using the server instead.")
 
-        if response.status_code == 200:
-            result = response.json()
+        if engine == "Local" and model is not None:
+            result, response = model.predict_one(input_data), None
+        else:
+            # In fallback mode we only give the server a few seconds before answering locally
+            timeout = (CONNECT_TIMEOUT, FALLBACK_TIMEOUT) if engine == "Fallback" and model is not None else None
+            try:
+                result, response = prediction_cache().get_or_fetch(
+                    st.session_state.get("user_email") or token,
+                    input_data,
+                    lambda: api_post("/predict", token=token, json=input_data, timeout=timeout,
+                                     count_failure=timeout is None),
+                )
+            except requests.RequestException:
+                if timeout is None:
+                    st.error("❌ Could not reach the prediction server, please try again in a moment.")
+                    st.stop()
+                st.caption("🐢 The prediction server is slow to respond, so this result comes from our local model.")
+                result, response = model.predict_one(input_data), None
+
+        if result is not None:
+            if response is None and result.get("engine") != "local":
+                st.caption("⚡ Same answers as a recent prediction, so this result was reused.")
+            if engine == "Shadow" and model is not None and result.get("engine") != "local":
+                shadow = model.predict_one(input_data)
+                # Counted with the other metrics, so the Operations page and its Prometheus export show the disagreement rate
+                metrics().increment("Predict", "shadow_comparisons")
+                if model.compare(shadow, result):
+                    metrics().increment("Predict", "shadow_disagreements")
+                    st.caption(f"🔍 Our local model disagrees: {100 * shadow['probability']:.2f}% "
+                               f"({metrics().counter('Predict', 'shadow_disagreements')} of "
+                               f"{metrics().counter('Predict', 'shadow_comparisons')} predictions differ so far)")
             st.success(f"✅ Prediction Complete: {'Likely Diabetic' if result['isDiabetes'] else 'Not Diabetic'}")
             st.write(f"Probability: {100*float(result['probability']):.2f}%")
+            # Kept for the what-if panel, which runs on later reruns when the form's values are gone
+            st.session_state.whatif_input = input_data
+            st.session_state.whatif_probability = float(result["probability"])
+            st.session_state.whatif_results = None
         else:
             st.error(f"❌ Prediction Failed: {response.json().get('error', 'Unknown error')}")
 
-if st.session_state.is_logged_in:
-    if st.sidebar.button("Logout"):
-        st.session_state.access_token = None
-        st.session_state.user_email = None
-        st.session_state.is_logged_in = False
-        st.success("✅ Logged out successfully.")
+if st.session_state.get("whatif_input") is not None:
+    st.write("# What if?")
+    st.write("See how your last prediction would change if some of your answers were different.")
+    base = st.session_state.whatif_input
+    options = SUGGESTED_FEATURES + [f for f in FEATURES if f not in SUGGESTED_FEATURES]
+    sweep_features = st.multiselect("Answers to vary (one or two)", options, default=["BMI"], max_selections=2)
+    points = st.slider("Points per number answer", 5, 50, 50) if set(sweep_features) & set(FLOAT_FEATURES) else 50
+
+    # The server saves every prediction it makes, so sweeps use the local model unless the user opts in
+    model = local_model()
+    use_server = st.checkbox("Score the variants on our server", value=model is None, disabled=model is None,
+                             help="The local model is instant and keeps your history clean; the server gives its exact answers.")
+    if use_server and sweep_features:
+        variants = len(build_grid(base, sweep_features, points)[1])
+        st.warning(f"⚠️ The server saves every prediction, so this adds up to {variants} rows to your Prediction History.")
+
+    if sweep_features and st.button("Run what-if"):
+        model = None if use_server else model
+        started = time.perf_counter()
+        with st.spinner("Scoring the variants..."):
+            grid = run_sweep(base, sweep_features, st.session_state.get("user_email") or token, token,
+                             points=points, model=model)
+        st.session_state.whatif_results = (sweep_features, grid, time.perf_counter() - started)
+
+    if st.session_state.get("whatif_results") is not None:
+        swept, grid, elapsed = st.session_state.whatif_results
+        failed = grid["probability"].isna().sum()
+        st.caption(f"Scored {len(grid)} variants in {elapsed:.1f}s"
+                   + (f", {failed} could not be scored" if failed else "")
+                   + f". Your current answers give {100 * st.session_state.whatif_probability:.2f}%.")
+        if len(swept) == 1:
+            curve = grid.set_index(swept[0])["probability"].mul(100).rename("Probability (%)")
+            if swept[0] in FLOAT_FEATURES:
+                st.line_chart(curve)
+            else:
+                st.bar_chart(curve)
+        else:
+            from charts import heatmap
+            st.altair_chart(heatmap(heatmap_data(grid, swept), swept[1], swept[0], "probability",
+                                    swept[1], swept[0], "Probability (%)"))
+
+st.write("# Or score a whole file at once")
+st.write("Upload a CSV or Parquet file with one row per person and the same columns the form sends: "
+         + ", ".join(FEATURES) + ". Use the numeric codes (for example Age 1-13 and 0/1 for yes or no questions) or the labels the form shows.")
+
+uploaded_file = st.file_uploader("Batch file", type=["csv", "parquet"])
+if uploaded_file is not None:
+    try:
+        batch_df = read_batch_file(uploaded_file)
+        encoded, rejected = validate_batch(batch_df)
+    except ValueError as e:
+        st.error(f"❌ {e}")
+        st.stop()
+
+    st.write(f"{len(encoded)} rows are ready to score.")
+    if len(rejected):
+        st.warning(f"⚠️ {len(rejected)} rows have invalid values and will be skipped.")
+
+    if st.button("Run batch prediction"):
+        # Clicking cancel reruns the script, which closes the generator and drops the queued rows
+        st.button("Cancel")
+        progress = st.progress(0.0)
+        status = st.empty()
+        results = {}
+        started = time.perf_counter()
+        scored = score_batch(encoded.to_dict("records"), token)
+        try:
+            for position, result in scored:
+                results[position] = result
+                done = len(results)
+                if done % 10 == 0 or done == len(encoded):
+                    elapsed = time.perf_counter() - started
+                    progress.progress(done / len(encoded))
+                    status.write(f"Scored {done} of {len(encoded)} rows ({done / elapsed:.1f} rows/s)")
+        finally:
+            scored.close()
+            # Partial results are kept too, so a cancelled batch can still be downloaded
+            st.session_state.batch_results = batch_results(batch_df, encoded, rejected, results)
+
+if st.session_state.get("batch_results") is not None:
+    output = st.session_state.batch_results
+    failed = output["error"].notna().sum()
+    st.success(f"✅ Batch finished: {len(output) - failed} rows scored, {failed} failed or skipped.")
+    st.dataframe(output.head(100))
+    st.download_button("Download results", output.to_csv(index=False), file_name="predictions.csv", mime="text/csv")
+
+metrics().observe("Predict", "rerun", time.perf_counter() - rerun_start)
+startup.first_render("Predict")
+
+session.logout_button()
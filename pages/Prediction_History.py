@@ -1,125 +1,92 @@
+import time
 import streamlit as st
-import requests
-from datetime import datetime
-import pandas as pd
-import zoneinfo as ZoneInfo
+import startup
+import session
 
-
-# Unless the user is logged in, they will not be able to view this page
-token = st.session_state.get("access_token", "")
-if not token:
-    st.error("❌ Oops! You need to be logged in first.")
-    st.stop()
+token = session.require_login()
 
 st.set_page_config(
     page_title="Prediction History - Group 1 COMP377",
 )
 
+# Everything below the login check is only imported for users who can see the page
+from metrics import metrics
+from history import history_cache, export_file, OUTCOMES
+
+rerun_start = time.perf_counter()
+
 st.title("Your Prediction History")
 st.sidebar.success(f"Go back to the landing page, make a prediction, or examine our data")
 
-API_BASE = "https://group1-comp377-groupproject-1.onrender.com"
-
-def map_age(age_code):
-    age_map = {
-        1: "18-24", 2: "25-29", 3: "30-34", 4: "35-39", 5: "40-44",
-        6: "45-49", 7: "50-54", 8: "55-59", 9: "60-64", 10: "65-69",
-        11: "70-74", 12: "75-79", 13: "80 or older"
-    }
-    return age_map.get(age_code, str(age_code))
-
-def map_education(edu_code):
-    edu_map = {
-        1: "No formal education",
-        2: "Elementary",
-        3: "Some high school",
-        4: "High school graduate",
-        5: "Some college",
-        6: "College graduate"
-    }
-    return edu_map.get(edu_code, str(edu_code))
-
-def map_income(income_code):
-    income_map = {
-        1: "Less than $10,000",
-        2: "Less than $15,000",
-        3: "Less than $20,000",
-        4: "Less than $25,000",
-        5: "Less than $35,000",
-        6: "Less than $50,000",
-        7: "Less than $75,000",
-        8: "$75,000 or more"
-    }
-    return income_map.get(income_code, str(income_code))
-
-def map_gen_health(health_code):
-    health_map = {
-        1: "Excellent",
-        2: "Very Good",
-        3: "Good",
-        4: "Fair",
-        5: "Poor"
-    }
-    return health_map.get(health_code, str(health_code))
-
-def map_boolean(value):
-    return "Yes" if value == 1 else "No"
-
-def transform_features(features):
-    transformed = features.copy()
-    transformed['Age'] = map_age(features['Age'])
-    transformed['Education'] = map_education(features['Education'])
-    transformed['Income'] = map_income(features['Income'])
-    transformed['GenHlth'] = map_gen_health(features['GenHlth'])
-    
-    boolean_fields = ['HighBP', 'HighChol', 'CholCheck', 'Smoker', 'Stroke', 
-                     'HeartDiseaseorAttack', 'PhysActivity', 'Fruits', 'Veggies',
-                     'HvyAlcoholConsump', 'AnyHealthcare', 'NoDocbcCost', 'DiffWalk', 'Sex']
-    
-    for field in boolean_fields:
-        if field in transformed:
-            transformed[field] = map_boolean(transformed[field])
-    
-    return transformed
+PAGE_SIZES = [10, 25, 50, 100]
 
 try:
-    response = requests.get(
-        f"{API_BASE}/predictions",
-        headers={"Authorization": f"Bearer {token}"}
-    )
-    
-    if response.status_code == 200:
-        predictions = response.json()
-        
-        if not predictions:
-            st.info("You haven't made any predictions yet. Go to the Predictions page to make your first prediction!")
-        else:
-            # Display predictions in a table format
-            for pred in predictions:
-                with st.expander(f"Prediction from {datetime.strptime(pred['created_at'], '%a, %d %b %Y %H:%M:%S GMT').astimezone(ZoneInfo.ZoneInfo('America/New_York')).strftime('%Y-%m-%d %I:%M:%S %p ET')}", expanded=False):
-                    
-                    result = "Likely Diabetic" if pred['prediction'] else "Not Diabetic"
-                    probability = float(pred['probability']) * 100
-                    
-                    
-                    st.markdown(f"**Result:** {result}")
-                    st.markdown(f"**Probability:** {probability:.2f}%")
-                    
-                    
-                    st.markdown("**Features Used:**")
-                    transformed_features = transform_features(pred['features'])
-                    features_df = pd.DataFrame([transformed_features])
-                    st.dataframe(features_df, use_container_width=True)
-                    
-    else:
+    cache = history_cache(st.session_state.get("user_email") or token)
+    response = cache.sync(token)
+
+    if response.status_code not in (200, 304):
         st.error(f"❌ Failed to fetch predictions: {response.json().get('error', 'Unknown error')}")
-        
+    elif cache.frame.empty:
+        st.info("You haven't made any predictions yet. Go to the Predictions page to make your first prediction!")
+    else:
+        predictions = cache.frame.drop(columns=["raw_created_at"])
+
+        page_size = st.selectbox("Predictions per page", PAGE_SIZES, index=1)
+        page_count = (len(predictions) - 1) // page_size + 1
+        page = st.number_input(f"Page (of {page_count})", min_value=1, max_value=page_count, value=1)
+        page_rows = predictions.iloc[(page - 1) * page_size:page * page_size]
+
+        # One table for the whole page, st.dataframe only draws the rows that are on screen
+        st.dataframe(
+            page_rows,
+            hide_index=True,
+            column_config={
+                "created_at": st.column_config.DatetimeColumn("Prediction from", format="YYYY-MM-DD hh:mm:ss A [ET]"),
+                "result": "Result",
+                "probability": st.column_config.NumberColumn("Probability", format="%.2f%%"),
+            },
+        )
+
+        if st.checkbox("Show details for one prediction"):
+            position = st.selectbox(
+                "Prediction",
+                range(len(page_rows)),
+                format_func=lambda i: page_rows["created_at"].iloc[i].strftime('%Y-%m-%d %I:%M:%S %p ET'),
+            )
+            row = page_rows.iloc[position]
+            st.markdown(f"**Result:** {row['result']}")
+            st.markdown(f"**Probability:** {row['probability']:.2f}%")
+            st.markdown("**Features Used:**")
+            st.table(row.drop(["created_at", "result", "probability"]).astype(str).rename("value"))
+
+        st.write("## Trends")
+        trends = cache.trends
+        outcome_totals = trends.outcome_counts().sum()
+        columns = st.columns(len(OUTCOMES) + 1)
+        columns[0].metric("Predictions", len(predictions))
+        for column, outcome in zip(columns[1:], OUTCOMES):
+            column.metric(outcome, int(outcome_totals[outcome]))
+        st.write("Probability over time (%)")
+        st.line_chart(trends.trend())
+        st.write("Predictions per day")
+        st.bar_chart(trends.outcome_counts())
+
+        st.write("## Export")
+        export_format = st.radio("Format", ["CSV", "Parquet"], horizontal=True)
+        extension = export_format.lower()
+        # The file is only built when the button is clicked, a chunk of rows at a time
+        st.download_button(
+            f"Download all {len(predictions)} predictions",
+            lambda: export_file(predictions, extension),
+            file_name=f"predictions.{extension}",
+            mime="text/csv" if extension == "csv" else "application/vnd.apache.parquet",
+            on_click="ignore",
+        )
+
 except Exception as e:
     st.error(f"❌ An error occurred: {str(e)}")
 
-if st.session_state.is_logged_in:
-    if st.sidebar.button("Logout"):
-        st.session_state.access_token = None
-        st.session_state.user_email = None
-        st.session_state.is_logged_in = False
-        st.success("✅ Logged out successfully.")
+metrics().observe("Prediction_History", "rerun", time.perf_counter() - rerun_start)
+startup.first_render("Prediction_History")
+
+session.logout_button()
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+import streamlit as st
+
+from store import shared_store
+
+# Entries kept in this process' memory; the shared store holds them for every replica until the TTL
+MAX_ENTRIES = int(os.environ.get("PREDICTION_CACHE_SIZE", 1000))
+TTL_SECONDS = float(os.environ.get("PREDICTION_CACHE_TTL", 3600))
+
+
+def feature_key(user, features, model_version=None):
+    # Same user, same encoded features and same model always hash the same, whatever the dict order
+    canonical = json.dumps({"user": user, "features": features, "model": model_version},
+                           sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode()).hexdigest()
+
+
+class PredictionCache:
+    """LRU + TTL memo of /predict results, with concurrent identical requests combined.
+
+    The in-memory LRU is bounded by `max_entries`; with a `store`, every result is
+    also written there, so a restarted process or another replica finds it too.
+    """
+
+    def __init__(self, max_entries=MAX_ENTRIES, ttl=TTL_SECONDS, store=None):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        # The backend may report which model answered, entries for an older model stop matching
+        self.model_version = store.get("predictions", "model_version") if store is not None else None
+        self._entries = OrderedDict()
+        self._in_flight = {}
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            result = self._get(key)
+        if result is None and self.store is not None:
+            result = self.store.get_json("predictions", key)
+            if result is not None:
+                self._remember(key, result)
+        return result
+
+    def _get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, result = entry
+        if time.time() - stored_at > self.ttl:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return result
+
+    def _remember(self, key, result):
+        with self._lock:
+            self._entries[key] = (time.time(), result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key, result):
+        self._remember(key, result)
+        if self.store is not None:
+            self.store.set_json("predictions", key, result, ttl=self.ttl)
+
+    def get_or_fetch(self, user, features, fetch):
+        """Return (result, response) for these features, calling fetch() only on a miss.
+
+        `fetch` returns the HTTP response; only a 200 is cached. `response` is None
+        for a cache hit. Callers asking for the same key while a request is in flight
+        wait for that request instead of sending their own.
+        """
+        key = feature_key(user, features, self.model_version)
+        result = self.get(key)
+        with self._lock:
+            if result is not None:
+                self.hits += 1
+                return result, None
+            self.misses += 1
+            future = self._in_flight.get(key)
+            owner = future is None
+            if owner:
+                future = self._in_flight[key] = Future()
+        flight_key = key
+
+        if not owner:
+            return future.result()
+
+        try:
+            response = fetch()
+            result = response.json() if response.status_code == 200 else None
+            if result is not None:
+                version = result.get("model_version")
+                if version is not None and version != self.model_version:
+                    self.model_version = version
+                    key = feature_key(user, features, version)
+                    if self.store is not None:
+                        self.store.set("predictions", "model_version", version)
+                self.put(key, result)
+            future.set_result((result, response))
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(flight_key, None)
+        return result, response
+
+    @property
+    def hit_rate(self):
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def prediction_cache():
+    return PredictionCache(store=shared_store())
@@ -0,0 +1,117 @@
+import hashlib
+import hmac
+import os
+import secrets
+
+import streamlit as st
+
+from store import shared_store
+
+# Name of the cookie carrying the signed session reference
+SESSION_COOKIE = "session"
+# SESSION_QUERY_PARAM=1 also accepts the reference as ?session=, for headless tests and scripts only:
+# in a URL it would end up in browser history, shared links, Referer headers and proxy logs
+ALLOW_QUERY_PARAM = os.environ.get("SESSION_QUERY_PARAM", "") == "1"
+# How long a login survives without being used, in seconds
+SESSION_TTL = int(os.environ.get("SESSION_TTL", 12 * 3600))
+
+
+def _secret():
+    # SESSION_SECRET wins; otherwise the first replica generates one and the others find it in the shared store
+    configured = os.environ.get("SESSION_SECRET")
+    if configured:
+        return configured.encode()
+    return shared_store().add("config", "session_secret", secrets.token_hex(32)).encode()
+
+
+def sign(session_id):
+    signature = hmac.new(_secret(), session_id.encode(), hashlib.sha256).hexdigest()
+    return f"{session_id}.{signature}"
+
+
+def verify(reference):
+    """The session id inside a signed reference, or None if it was not signed by us."""
+    session_id, _, signature = (reference or "").partition(".")
+    if not session_id or not hmac.compare_digest(sign(session_id), reference):
+        return None
+    return session_id
+
+
+def _set_cookie(value, max_age):
+    # Streamlit cannot set cookies from the server, so a one-line script does it in the browser
+    st.html(f"<script>document.cookie = '{SESSION_COOKIE}={value}; path=/; max-age={max_age}; Secure; SameSite=Strict';</script>",
+            unsafe_allow_javascript=True)
+
+
+def _reference():
+    # The cookie on browser connections; the query parameter only when tests or scripts turned it on
+    cookie = st.context.cookies.get(SESSION_COOKIE)
+    if isinstance(cookie, str) and cookie:
+        return cookie
+    return st.query_params.get(SESSION_COOKIE) if ALLOW_QUERY_PARAM else None
+
+
+def restore():
+    """Put a login back into st.session_state from the signed reference, if there is a valid one.
+
+    The login page calls it directly and the others through require_login(). A reconnect,
+    a reload or a request that lands on another replica logs the user straight back in.
+    """
+    if st.session_state.get("access_token"):
+        return
+    session_id = verify(_reference())
+    data = shared_store().get_json("sessions", session_id) if session_id else None
+    if data is None:
+        return
+    st.session_state.access_token = data["access_token"]
+    st.session_state.user_email = data["user_email"]
+    st.session_state.is_logged_in = True
+    st.session_state.session_id = session_id
+    # Using a session keeps it alive
+    shared_store().set_json("sessions", session_id, data, ttl=SESSION_TTL)
+
+
+def require_login():
+    """Restore a saved login and stop the page unless the user is logged in. Returns the access token.
+
+    Every page that needs a login calls it first, before importing or drawing anything else.
+    """
+    restore()
+    token = st.session_state.get("access_token")
+    if not token:
+        st.error("❌ Oops! You need to be logged in first.")
+        st.stop()
+    return token
+
+
+def login(access_token, user_email):
+    """Log the user into this browser session and remember it in the shared store."""
+    session_id = secrets.token_urlsafe(32)
+    shared_store().set_json("sessions", session_id,
+                            {"access_token": access_token, "user_email": user_email}, ttl=SESSION_TTL)
+    st.session_state.access_token = access_token
+    st.session_state.user_email = user_email
+    st.session_state.is_logged_in = True
+    st.session_state.session_id = session_id
+    _set_cookie(sign(session_id), SESSION_TTL)
+
+
+def logout():
+    session_id = st.session_state.get("session_id")
+    if session_id:
+        shared_store().delete("sessions", session_id)
+    _set_cookie("", 0)
+    if SESSION_COOKIE in st.query_params:
+        del st.query_params[SESSION_COOKIE]
+    st.session_state.access_token = None
+    st.session_state.user_email = None
+    st.session_state.is_logged_in = False
+    st.session_state.session_id = None
+
+
+def logout_button():
+    # The sidebar logout every page ends with
+    if st.session_state.get("is_logged_in"):
+        if st.sidebar.button("Logout"):
+            logout()
+            st.success("✅ Logged out successfully.")
@@ -0,0 +1,136 @@
+import os
+import sys
+import threading
+import time
+from importlib.abc import Loader, MetaPathFinder
+
+from metrics import metrics
+
+# STARTUP_PROFILE=1 times every module imported after this one and prints a report on each page's first render
+PROFILE_STARTUP = os.environ.get("STARTUP_PROFILE", "") == "1"
+# How many of the slowest imports the report lists
+REPORT_MODULES = 15
+
+_first_renders = {}
+_first_renders_lock = threading.Lock()
+
+
+def process_started_at():
+    # Wall-clock time the process was created, from /proc on Linux; elsewhere when this module was imported
+    try:
+        with open("/proc/self/stat") as f:
+            ticks = int(f.read().rsplit(")", 1)[1].split()[19])
+        with open("/proc/stat") as f:
+            boot_time = next(int(line.split()[1]) for line in f if line.startswith("btime"))
+        return boot_time + ticks / os.sysconf("SC_CLK_TCK")
+    except (OSError, ValueError, IndexError, StopIteration):
+        return time.time()
+
+
+PROCESS_STARTED_AT = process_started_at()
+
+
+class _TimedLoader(Loader):
+    """Wraps a module's real loader for the length of one import and records how long it took."""
+
+    def __init__(self, loader, timer):
+        self.loader = loader
+        self.timer = timer
+
+    def create_module(self, spec):
+        self.timer.enter()
+        try:
+            create = getattr(self.loader, "create_module", None)
+            return create(spec) if create else None
+        except BaseException:
+            self.timer.leave(spec.name)
+            raise
+
+    def exec_module(self, module):
+        try:
+            self.loader.exec_module(module)
+        finally:
+            self.timer.leave(module.__name__)
+            # Hand the module its real loader back, nothing should see the wrapper once the import is done
+            module.__loader__ = self.loader
+            if module.__spec__ is not None:
+                module.__spec__.loader = self.loader
+
+    def __getattr__(self, name):
+        return getattr(self.loader, name)
+
+
+class ImportTimer(MetaPathFinder):
+    """Meta path hook recording cumulative and self time per imported module, like python -X importtime."""
+
+    def __init__(self):
+        # name -> (cumulative seconds, self seconds)
+        self.times = {}
+        self._local = threading.local()
+
+    def find_spec(self, name, path=None, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(name, path, target)
+            if spec is not None:
+                if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                    spec.loader = _TimedLoader(spec.loader, self)
+                return spec
+        return None
+
+    def enter(self):
+        # Each import on the stack keeps its start time and how long its own nested imports took
+        stack = self._local.__dict__.setdefault("stack", [])
+        stack.append([time.perf_counter(), 0.0])
+
+    def leave(self, name):
+        started, children = self._local.stack.pop()
+        elapsed = time.perf_counter() - started
+        self.times[name] = (elapsed, elapsed - children)
+        if self._local.stack:
+            self._local.stack[-1][1] += elapsed
+
+    def report(self, limit=REPORT_MODULES):
+        """The slowest imports as dicts, plus the total of every module's self time."""
+        rows = sorted(self.times.items(), key=lambda item: item[1][0], reverse=True)[:limit]
+        total = sum(own for _, own in self.times.values())
+        return [{"module": name, "cumulative": cumulative, "self": own} for name, (cumulative, own) in rows], total
+
+
+def _install():
+    for finder in sys.meta_path:
+        if isinstance(finder, ImportTimer):
+            return finder
+    timer = ImportTimer()
+    sys.meta_path.insert(0, timer)
+    return timer
+
+
+# One timer per process, however many pages import this module
+import_timer = _install() if PROFILE_STARTUP else None
+
+
+def first_render(page):
+    """Record the first time `page` finishes rendering in this process, in seconds since the process started.
+
+    Only the first call per page does anything. In profiling mode it also prints
+    the slowest imports so far, which is what a cold replica pays before serving.
+    """
+    with _first_renders_lock:
+        if page in _first_renders:
+            return
+        _first_renders[page] = time.time() - PROCESS_STARTED_AT
+
+    metrics().observe(page, "first_render", _first_renders[page])
+    if import_timer is not None:
+        rows, total = import_timer.report()
+        print(f"Startup profile: {page} first rendered {_first_renders[page]:.2f}s after the process started, "
+              f"{total:.2f}s spent importing modules")
+        for row in rows:
+            print(f"  {row['cumulative']:8.3f}s {row['self']:8.3f}s  {row['module']}")
+
+
+def first_renders():
+    with _first_renders_lock:
+        return dict(_first_renders)
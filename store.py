@@ -0,0 +1,123 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+import streamlit as st
+
+# SQLite file shared by every replica on this host. WAL mode needs all of them on the same machine,
+# never put it on a network filesystem. ":memory:" keeps everything in this process, like before
+STORE_PATH = os.environ.get("APP_STORE_PATH", "app_state.sqlite3")
+# Replicas on different hosts share a Redis server instead, e.g. APP_STORE_URL=redis://cache:6379/0
+STORE_URL = os.environ.get("APP_STORE_URL")
+# Expired rows are deleted after this many writes, reads already ignore them
+PURGE_EVERY = 500
+
+
+class KeyValueStore:
+    """What the app needs from a shared store: get, set, add and delete by (namespace, key).
+
+    Values are bytes or str and come back as the type they were stored as.
+    """
+
+    def get_json(self, namespace, key):
+        value = self.get(namespace, key)
+        return json.loads(value) if value is not None else None
+
+    def set_json(self, namespace, key, value, ttl=None):
+        self.set(namespace, key, json.dumps(value), ttl)
+
+
+class SQLiteStore(KeyValueStore):
+    """Small key/value store with a TTL per entry, shared by every process on this host that opens the same file."""
+
+    def __init__(self, path=STORE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._writes = 0
+        # One connection shared by this process' threads, guarded by the lock; WAL lets other processes read while we write
+        self._db = sqlite3.connect(path, check_same_thread=False, timeout=30)
+        with self._lock, self._db:
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " namespace TEXT NOT NULL, key TEXT NOT NULL, value BLOB, expires_at REAL,"
+                " PRIMARY KEY (namespace, key))"
+            )
+
+    def get(self, namespace, key):
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE namespace = ? AND key = ? AND (expires_at IS NULL OR expires_at > ?)",
+                (namespace, key, time.time()),
+            ).fetchone()
+        return row[0] if row else None
+
+    def set(self, namespace, key, value, ttl=None):
+        """Store `value` under (namespace, key), forever or for `ttl` seconds."""
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock, self._db:
+            self._db.execute("INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?)", (namespace, key, value, expires_at))
+            self._writes += 1
+            if self._writes % PURGE_EVERY == 0:
+                self._db.execute("DELETE FROM entries WHERE expires_at <= ?", (time.time(),))
+
+    def add(self, namespace, key, value, ttl=None):
+        # Set only if nothing is stored yet, and return whatever is stored afterwards; safe across processes
+        expires_at = time.time() + ttl if ttl else None
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ? AND expires_at <= ?",
+                             (namespace, key, time.time()))
+            self._db.execute("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?)", (namespace, key, value, expires_at))
+        return self.get(namespace, key)
+
+    def delete(self, namespace, key):
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+
+class RedisStore(KeyValueStore):
+    """The same store on a Redis server, for replicas spread over several hosts. Redis expires the entries itself."""
+
+    def __init__(self, url=STORE_URL):
+        # Only deployments that set APP_STORE_URL need the redis package
+        import redis
+
+        self.url = url
+        self._redis = redis.Redis.from_url(url)
+
+    @staticmethod
+    def _key(namespace, key):
+        return f"{namespace}:{key}"
+
+    @staticmethod
+    def _encode(value):
+        # Redis only keeps bytes, a one-byte prefix remembers whether the value was str
+        return b"s" + value.encode() if isinstance(value, str) else b"b" + bytes(value)
+
+    @staticmethod
+    def _decode(data):
+        if data is None:
+            return None
+        return data[1:].decode() if data[:1] == b"s" else data[1:]
+
+    def get(self, namespace, key):
+        return self._decode(self._redis.get(self._key(namespace, key)))
+
+    def set(self, namespace, key, value, ttl=None):
+        """Store `value` under (namespace, key), forever or for `ttl` seconds."""
+        self._redis.set(self._key(namespace, key), self._encode(value), px=int(ttl * 1000) if ttl else None)
+
+    def add(self, namespace, key, value, ttl=None):
+        # Set only if nothing is stored yet, and return whatever is stored afterwards
+        self._redis.set(self._key(namespace, key), self._encode(value), nx=True, px=int(ttl * 1000) if ttl else None)
+        return self.get(namespace, key)
+
+    def delete(self, namespace, key):
+        self._redis.delete(self._key(namespace, key))
+
+
+@st.cache_resource(show_spinner=False)
+def shared_store():
+    return RedisStore() if STORE_URL else SQLiteStore()
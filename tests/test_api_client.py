@@ -0,0 +1,100 @@
+import time
+
+import pytest
+import requests
+
+import api_client
+from bench.fake_backend import FakeBackend
+
+COOLDOWN = 0.2
+
+
+@pytest.fixture
+def backend(monkeypatch):
+    fake = FakeBackend()
+    server = fake.serve()
+    health = api_client.BackendHealth(failure_threshold=3, cooldown=COOLDOWN)
+    monkeypatch.setattr(api_client, "API_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(api_client, "backend_health", lambda: health)
+    yield fake, health
+    server.shutdown()
+
+
+def fail(times):
+    # POSTs are not retried by the session, so each one is exactly one 503 from the fake backend
+    for _ in range(times):
+        assert api_client.api_post("/predict").status_code == 503
+
+
+def test_breaker_opens_after_consecutive_failures(backend):
+    fake, health = backend
+    fake.error_rate = 1.0
+    fail(2)
+    assert health.state == "closed"
+    fail(1)
+    assert health.state == "open"
+    assert health.status == "unavailable"
+
+
+def test_open_breaker_rejects_without_touching_the_network(backend):
+    fake, health = backend
+    fake.error_rate = 1.0
+    fail(3)
+    sent = fake.requests
+    with pytest.raises(api_client.BackendUnavailable):
+        api_client.api_get("/")
+    assert fake.requests == sent
+
+
+def test_breaker_lets_one_trial_through_and_closes_when_it_succeeds(backend):
+    fake, health = backend
+    fake.error_rate = 1.0
+    fail(3)
+    fake.error_rate = 0.0
+    time.sleep(COOLDOWN)
+    assert health.allow_request()
+    # The trial slot is taken, everyone else still fails fast until it comes back
+    assert not health.allow_request()
+    health.release_trial()
+
+    assert api_client.api_get("/").status_code == 200
+    assert health.state == "closed"
+    assert health.consecutive_failures == 0
+
+
+def test_failed_trial_opens_the_breaker_again(backend):
+    fake, health = backend
+    fake.error_rate = 1.0
+    fail(3)
+    time.sleep(COOLDOWN)
+    fail(1)
+    assert health.state == "open"
+
+
+def test_own_short_deadline_does_not_count_as_a_failure(backend):
+    fake, health = backend
+    fake.latency = 0.3
+    for _ in range(5):
+        with pytest.raises(requests.Timeout):
+            api_client.api_post("/predict", timeout=(1, 0.05), count_failure=False)
+    assert health.state == "closed"
+    assert health.consecutive_failures == 0
+
+    for _ in range(3):
+        with pytest.raises(requests.Timeout):
+            api_client.api_post("/predict", timeout=(1, 0.05))
+    assert health.state == "open"
+
+
+def test_warm_up_pings_once_per_interval(backend):
+    fake, health = backend
+    fake.cold_start = 0.2
+    for _ in range(5):
+        api_client.warm_up_backend()
+    assert health.status == "waking up"
+    deadline = time.monotonic() + 5
+    while health.warming_up and time.monotonic() < deadline:
+        time.sleep(0.01)
+    api_client.warm_up_backend()
+    assert fake.requests == 1
+    assert health.status == "online"
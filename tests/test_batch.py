@@ -0,0 +1,111 @@
+import io
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+from urllib3.exceptions import MaxRetryError, NewConnectionError
+
+import api_client
+import batch
+from features import FEATURES
+
+
+def upload(rows):
+    header = ",".join(FEATURES)
+    lines = [",".join(str(row[f]) for f in FEATURES) for row in rows]
+    file = io.BytesIO("\n".join([header] + lines).encode())
+    file.name = "batch.csv"
+    return file
+
+
+def valid_row(**overrides):
+    row = {f: 0 for f in FEATURES}
+    row.update({"BMI": 27.5, "GenHlth": 3, "Age": 5, "Education": 4, "Income": 6}, **overrides)
+    return row
+
+
+def test_clean_file_has_no_rejected_rows():
+    df = batch.read_batch_file(upload([valid_row(), valid_row(Age=9), valid_row(BMI=31.2)]))
+    encoded, rejected = batch.validate_batch(df)
+    assert len(encoded) == 3
+    assert rejected.empty
+    assert list(rejected.columns) == ["error"]
+
+
+def test_dirty_file_rejects_only_bad_rows_with_reasons():
+    df = batch.read_batch_file(upload([valid_row(), valid_row(BMI=500, Age=99), valid_row(Smoker=7)]))
+    encoded, rejected = batch.validate_batch(df)
+    assert list(encoded.index) == [0]
+    assert rejected["error"].to_dict() == {1: "Invalid BMI, Age", 2: "Invalid Smoker"}
+
+
+def test_missing_columns_are_reported():
+    with pytest.raises(ValueError, match="Missing columns: BMI"):
+        batch.validate_batch(batch.read_batch_file(upload([valid_row()])).drop(columns="BMI"))
+
+
+class Calls:
+    def __init__(self, *outcomes):
+        self.outcomes = list(outcomes)
+        self.count = 0
+
+    def __call__(self, *args, **kwargs):
+        self.count += 1
+        outcome = self.outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        response = requests.Response()
+        response.status_code = outcome
+        response._content = b'{"isDiabetes": true, "probability": 0.7}' if outcome == 200 else b"{}"
+        return response
+
+
+def test_read_timeout_is_not_retried(monkeypatch):
+    calls = Calls(requests.ReadTimeout("read timed out"), 200)
+    monkeypatch.setattr(batch, "api_post", calls)
+    result = batch.predict_row(valid_row(), "token", retries=2, backoff=0)
+    assert calls.count == 1
+    assert result["prediction"] is None and "read timed out" in result["error"]
+
+
+def test_connection_errors_and_gateway_errors_are_retried(monkeypatch):
+    calls = Calls(requests.ConnectTimeout("connect timed out"), 503, 200)
+    monkeypatch.setattr(batch, "api_post", calls)
+    result = batch.predict_row(valid_row(), "token", retries=2, backoff=0)
+    assert calls.count == 3
+    assert result == {"prediction": True, "probability": 0.7, "error": None}
+
+
+def test_refused_connections_are_retried(monkeypatch):
+    refused = requests.ConnectionError(MaxRetryError(None, "/predict", NewConnectionError(None, "refused")))
+    calls = Calls(refused, 200)
+    monkeypatch.setattr(batch, "api_post", calls)
+    assert batch.predict_row(valid_row(), "token", retries=2, backoff=0)["error"] is None
+    assert calls.count == 2
+
+
+class DropAfterBody(BaseHTTPRequestHandler):
+    # Reads the whole POST, then hangs up without answering, like a backend dying mid-request
+    received = 0
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers["Content-Length"]))
+        DropAfterBody.received += 1
+        self.close_connection = True
+
+    def log_message(self, *args):
+        pass
+
+
+def test_connection_dropped_after_the_body_is_not_retried(monkeypatch):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), DropAfterBody)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(api_client, "API_BASE", f"http://127.0.0.1:{server.server_address[1]}")
+    monkeypatch.setattr(api_client, "backend_health", lambda health=api_client.BackendHealth(): health)
+    try:
+        result = batch.predict_row(valid_row(), "token", retries=2, backoff=0)
+    finally:
+        server.shutdown()
+    assert result["prediction"] is None and "aborted" in result["error"]
+    assert DropAfterBody.received == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from chunked import QuantileSketch, aggregate_file
+from data_stats import box_summary, column_summary, histogram
+from dataset import apply_schema
+from features import FEATURE_SCHEMA
+
+ROWS = 5000
+
+
+@pytest.fixture(scope="module")
+def dataset(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({"ID": np.arange(ROWS), "Diabetes_binary": rng.integers(0, 2, ROWS)})
+    for name, feature in FEATURE_SCHEMA.items():
+        df[name] = rng.integers(feature.low, feature.high + 1, ROWS)
+    # A skewed BMI with a long tail, so the boxplot has fliers
+    df["BMI"] = np.clip(np.rint(rng.lognormal(3.3, 0.25, ROWS)), 12, 98)
+    path = tmp_path_factory.mktemp("data") / "dataset.csv"
+    df.to_csv(path, index=False)
+    return path, apply_schema(df)
+
+
+@pytest.mark.parametrize("processes", [0, 2])
+def test_chunked_aggregates_match_the_in_memory_statistics(dataset, processes):
+    path, df = dataset
+    aggregates = aggregate_file(str(path), chunk_rows=700, processes=processes)
+
+    assert aggregates.rows == ROWS
+    expected = column_summary(df, f"test-{processes}")
+    pd.testing.assert_frame_equal(aggregates.column_summary()[expected.columns], expected, check_dtype=False)
+
+    chunked_box, memory_box = aggregates.box_summary("BMI"), box_summary(df["BMI"].to_numpy())
+    for key in ("med", "q1", "q3", "whislo", "whishi", "mean", "count", "outliers"):
+        assert chunked_box[key] == pytest.approx(memory_box[key]), key
+    np.testing.assert_array_equal(chunked_box["fliers"], memory_box["fliers"])
+
+    for column in ("BMI", "Age", "MentHlth"):
+        chunked_edges, chunked_counts = aggregates.histogram(column)
+        memory_edges, memory_counts = histogram(df[column].to_numpy())
+        np.testing.assert_array_equal(chunked_edges, memory_edges)
+        np.testing.assert_array_equal(chunked_counts, memory_counts)
+
+
+def test_quantile_sketch_matches_numpy_percentile():
+    rng = np.random.default_rng(1)
+    parts = [rng.integers(0, 60, 1000), rng.integers(20, 90, 333), np.array([7])]
+    sketch = QuantileSketch()
+    for part in parts:
+        other = QuantileSketch()
+        other.add(part)
+        sketch.merge(other)
+    values = np.concatenate(parts)
+    for q in (0, 0.1, 0.25, 0.5, 0.75, 0.9, 1):
+        assert sketch.quantile(q) == pytest.approx(np.percentile(values, 100 * q))
+
+
+def test_compacted_sketch_stays_within_one_grid_step():
+    values = np.random.default_rng(2).normal(50, 10, 20000)
+    sketch = QuantileSketch(max_bins=256)
+    sketch.add(values)
+    step = (values.max() - values.min()) / 255
+    assert len(sketch.counts) <= 256
+    for q in (0.25, 0.5, 0.75):
+        assert abs(sketch.quantile(q) - np.percentile(values, 100 * q)) <= step
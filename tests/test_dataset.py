@@ -0,0 +1,56 @@
+import subprocess
+import sys
+import threading
+from pathlib import Path
+
+import pytest
+
+import dataset
+
+
+def test_lock_waits_for_its_holder_and_times_out(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    with dataset.DatasetLock(csv_path):
+        with pytest.raises(TimeoutError):
+            with dataset.DatasetLock(csv_path, timeout=0.6):
+                pass
+    with dataset.DatasetLock(csv_path, timeout=0.6):
+        pass
+
+
+def test_lock_is_handed_over_when_released(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    holders = []
+    first = dataset.DatasetLock(csv_path).__enter__()
+
+    def wait():
+        with dataset.DatasetLock(csv_path, timeout=5):
+            holders.append("second")
+
+    waiter = threading.Thread(target=wait)
+    waiter.start()
+    waiter.join(0.8)
+    assert holders == []
+    first.__exit__(None, None, None)
+    waiter.join(5)
+    assert holders == ["second"]
+
+
+def test_lock_of_a_dead_process_is_free(tmp_path):
+    # A download that crashes while holding the lock must not block the next one
+    csv_path = tmp_path / "data.csv"
+    code = f"import dataset, os; dataset.DatasetLock({str(csv_path)!r}).__enter__(); os._exit(1)"
+    subprocess.run([sys.executable, "-c", code], cwd=Path(dataset.__file__).parent, check=False)
+    with dataset.DatasetLock(csv_path, timeout=0.6):
+        pass
+
+
+def test_a_download_that_fails_its_checksum_is_not_loaded(tmp_path):
+    csv_path = tmp_path / "data.csv"
+    csv_path.write_text("ID,Diabetes_binary\n1,0\n")
+    dataset.checksum_path(csv_path).write_text(dataset.file_sha256(csv_path))
+    dataset.check_dataset(csv_path)
+
+    csv_path.write_text("ID,Diabetes_binary\n1,1\n")
+    with pytest.raises(ValueError, match="checksum"):
+        dataset.load_dataset(csv_path)
@@ -0,0 +1,114 @@
+import io
+import json
+
+import pandas as pd
+import pytest
+import requests
+from streamlit.runtime.download_data_util import convert_data_to_bytes_and_infer_mime
+
+import history
+from features import FEATURES
+
+FEATURES_SENT = {**{f: 0 for f in FEATURES}, "BMI": 27.5, "GenHlth": 3, "Age": 5, "Education": 4, "Income": 6}
+
+
+def record(second, probability=0.42, prediction=0, day=5, **extra):
+    return {"created_at": f"Mon, {day:02d} Oct 2026 14:00:{second:02d} GMT", "prediction": prediction,
+            "probability": probability, "features": FEATURES_SENT, **extra}
+
+
+def serve(monkeypatch, *bodies):
+    bodies = list(bodies)
+
+    def api_get(path, token=None, headers=None, params=None):
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(bodies.pop(0)).encode()
+        return response
+
+    monkeypatch.setattr(history, "api_get", api_get)
+
+
+def test_identical_predictions_in_one_response_are_all_kept(monkeypatch):
+    serve(monkeypatch, [record(1), record(1), record(1)])
+    cache = history.HistoryCache()
+    cache.sync("token")
+    assert len(cache.frame) == 3
+    assert cache.trends.daily["count"].sum() == 3
+
+
+def test_inclusive_since_drops_only_the_copies_already_cached(monkeypatch):
+    # The second response repeats the boundary second: two known copies, one new one, and a newer row
+    serve(monkeypatch, [record(1), record(1), record(0)],
+          [record(1), record(1), record(1), record(2, probability=0.9, prediction=1)])
+    cache = history.HistoryCache()
+    cache.sync("token")
+    cache.sync("token")
+    assert len(cache.frame) == 5
+    assert cache.frame["raw_created_at"].str.endswith(":01 GMT").sum() == 3
+    assert cache.trends.daily["count"].sum() == 5
+
+
+def test_backend_ignoring_since_adds_nothing_twice(monkeypatch):
+    everything = [record(0), record(1), record(1)]
+    serve(monkeypatch, everything, everything)
+    cache = history.HistoryCache()
+    cache.sync("token")
+    cache.sync("token")
+    assert len(cache.frame) == 3
+
+
+def test_records_with_ids_are_matched_by_id(monkeypatch):
+    serve(monkeypatch, [record(1, id=1), record(1, id=2)], [record(1, id=1), record(1, id=2), record(1, id=3)])
+    cache = history.HistoryCache()
+    cache.sync("token")
+    cache.sync("token")
+    assert sorted(cache.frame["id"]) == [1, 2, 3]
+
+
+def test_empty_sync_keeps_the_frame_and_its_dtypes(monkeypatch):
+    serve(monkeypatch, [record(1), record(2, prediction=1)], [])
+    cache = history.HistoryCache()
+    cache.sync("token")
+    before = cache.frame.copy()
+    cache.sync("token")
+    assert isinstance(cache.frame["result"].dtype, pd.CategoricalDtype)
+    pd.testing.assert_frame_equal(cache.frame, before)
+
+
+def history_frame(rows=23):
+    return history.decode_predictions([record(i % 60, probability=i / 100, prediction=i % 2) for i in range(rows)])
+
+
+def read_export(data, fmt):
+    return pd.read_csv(io.BytesIO(data)) if fmt == "csv" else pd.read_parquet(io.BytesIO(data))
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_chunks_join_into_one_file(fmt):
+    frame = history_frame()
+    exported = read_export(b"".join(history.export_chunks(frame, fmt, chunk_rows=5)), fmt)
+    assert len(exported) == len(frame)
+    assert exported["probability"].tolist() == pytest.approx(frame["probability"].tolist())
+    assert exported["raw_created_at"].tolist() == frame["raw_created_at"].tolist()
+
+
+@pytest.mark.parametrize("fmt", ["csv", "parquet"])
+def test_export_file_is_accepted_by_streamlit_download(fmt):
+    frame = history_frame()
+    data, _ = convert_data_to_bytes_and_infer_mime(history.export_file(frame, fmt), TypeError("unsupported"))
+    assert len(read_export(data, fmt)) == len(frame)
+
+
+def test_trends_add_up_per_day_and_roll_over_the_window():
+    trends = history.HistoryTrends()
+    trends.add(history.decode_predictions([record(0, 0.2, day=5), record(1, 0.4, prediction=1, day=5)]))
+    trends.add(history.decode_predictions([record(0, 0.8, prediction=1, day=6)]))
+    trends.add(history.decode_predictions([record(2, 0.6, day=5)]))
+
+    assert trends.daily["count"].tolist() == [3, 1]
+    assert trends.outcome_counts().to_dict("list") == {"Not Diabetic": [2, 0], "Likely Diabetic": [1, 1]}
+    trend = trends.trend("7D")
+    assert trend["Daily average"].tolist() == pytest.approx([40, 80])
+    # Weighted by predictions: (20 + 40 + 60 + 80) / 4
+    assert trend["7D rolling average"].tolist() == pytest.approx([40, 50])
@@ -0,0 +1,107 @@
+import itertools
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+
+from api_client import api_post
+from features import FEATURE_SCHEMA, FEATURE_RANGES, FLOAT_FEATURES
+from prediction_cache import prediction_cache
+
+# Features a user can realistically change, offered first in the what-if panel
+SUGGESTED_FEATURES = ["BMI", "Smoker", "PhysActivity", "HvyAlcoholConsump", "Fruits", "Veggies", "GenHlth"]
+# BMI sweeps cover the plausible adult range rather than the form's full 0-100
+FLOAT_SWEEP_RANGES = {"BMI": (15.0, 50.0)}
+# Upper bound on distinct vectors one sweep may score, the longest value ranges are thinned to fit
+MAX_GRID_POINTS = 200
+
+
+def sweep_values(feature, current, points=50):
+    """At most `points` values to try for one feature, always including the user's own value."""
+    if feature in FLOAT_FEATURES:
+        low, high = FLOAT_SWEEP_RANGES.get(feature, FEATURE_RANGES[feature])
+        # Rounded to one decimal like the form's slider, so neighbouring points collapse instead of re-scoring
+        values = np.round(np.linspace(low, high, max(points - 1, 2)), 1).tolist()
+        return sorted(set(values) | {round(float(current), 1)})
+    low, high = FEATURE_RANGES[feature]
+    if high - low + 1 <= points:
+        return list(range(low, high + 1))
+    values = np.round(np.linspace(low, high, max(points - 1, 2))).astype(int).tolist()
+    return sorted(set(values) | {int(current)})
+
+
+def range_size(feature, points):
+    # Values a feature would get without the grid cap, `points` for float features
+    if feature in FLOAT_FEATURES:
+        return points
+    low, high = FEATURE_RANGES[feature]
+    return high - low + 1
+
+
+def build_grid(base, features, points=50):
+    """Variants of `base` over every combination of values of `features`, without duplicates.
+
+    Returns (values, vectors): the values tried per feature and one feature dict per
+    distinct combination. Features with long ranges, float or integer, are thinned so
+    the grid never exceeds MAX_GRID_POINTS.
+    """
+    counts = {}
+    budget = MAX_GRID_POINTS
+    # Short ranges are kept whole and leave the rest of the budget to the longer ones
+    for i, feature in enumerate(sorted(features, key=lambda f: range_size(f, points))):
+        share = int(budget ** (1 / (len(features) - i)) + 1e-9)
+        counts[feature] = min(range_size(feature, points), share)
+        budget //= counts[feature]
+    values = {f: sweep_values(f, base[f], counts[f]) for f in features}
+
+    vectors = {}
+    for combination in itertools.product(*values.values()):
+        vector = {**base, **dict(zip(features, combination))}
+        vectors.setdefault(tuple(sorted(vector.items())), vector)
+    return values, list(vectors.values())
+
+
+def score_remote(vector, user, token):
+    # Through the shared prediction cache, so points scored before (or in flight elsewhere) are not sent again
+    try:
+        result, _ = prediction_cache().get_or_fetch(
+            user, vector, lambda: api_post("/predict", token=token, json=vector))
+    except requests.RequestException as e:
+        return {"probability": np.nan, "error": str(e)}
+    if result is None:
+        return {"probability": np.nan, "error": "Prediction failed"}
+    return {"probability": float(result["probability"]), "error": None}
+
+
+def run_sweep(base, features, user, token, points=50, model=None, max_workers=8):
+    """Score every variant of `base` over `features` and return one row per grid point.
+
+    With a local `model` the whole grid is one vectorized call; otherwise the
+    distinct vectors are sent to /predict concurrently, `max_workers` at a time,
+    and the backend saves every one of them to the user's prediction history.
+    """
+    values, vectors = build_grid(base, features, points)
+    grid = pd.DataFrame(vectors)
+    if model is not None:
+        grid["probability"] = model.predict_proba(grid)
+        grid["error"] = None
+    else:
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            scored = list(executor.map(lambda vector: score_remote(vector, user, token), vectors))
+        grid["probability"] = [s["probability"] for s in scored]
+        grid["error"] = [s["error"] for s in scored]
+    return grid[features + ["probability", "error"]]
+
+
+def heatmap_data(grid, features):
+    """Long-format probabilities (%) for a two-feature sweep, with the values shown as their labels.
+
+    Rows run from the highest value of the first feature down, so it reads bottom to top like an axis.
+    """
+    data = grid.sort_values(features, ascending=[False, True])
+    return pd.DataFrame({
+        features[1]: [FEATURE_SCHEMA[features[1]].decode(v) for v in data[features[1]]],
+        features[0]: [FEATURE_SCHEMA[features[0]].decode(v) for v in data[features[0]]],
+        "probability": data["probability"] * 100,
+    })